@@ -0,0 +1,322 @@
+"""
+Headless analytics layer: the dashboard's analyses as plain Python calls,
+plus a CLI for batch use. Nothing here renders; everything returns
+DataFrames or JSON-ready dicts, so it runs without a Streamlit session
+(the st.cache_* helpers it builds on fall back to in-memory caches).
+
+    python analytics.py report --artists "Artist 1" "Artist 2" [--format parquet --output reports.parquet]
+    python analytics.py report --top-artists 50 --workers 8
+    python analytics.py decades
+    python analytics.py trends --period decade [--by artist]
+    python analytics.py top positive_songs -n 20 --decades 1970 1980
+    python analytics.py serve --port 8600        # HTTP API, see api.py
+
+`--data-dir` points at the directory holding the dataset/store;
+`--synthetic N` first writes a stand-in corpus of N songs there.
+Artist reports are computed on a worker pool and streamed (JSON Lines,
+or Parquet in batches) as they complete.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from streamlit import logger as st_logger
+from artist_comparison import get_most_frequent_words
+from emotions import get_song_emotions
+from filters import filter_cache, filtered_songs, song_filter
+from loader import ensure_store, get_corpus
+from multi_artist import artist_summary
+from ranking import MIN_VIEWS, top_songs
+from similarity import similar_artists
+from trends import PERIODS, trend_table
+
+REPORT_WORKERS = min(8, os.cpu_count() or 1)
+PARQUET_BATCH = 64
+SONG_COLUMNS = ['title', 'artist', 'year', 'views', 'sentiment']
+TOP_TABLES = {
+    # kind: (column, largest first)
+    'songs_by_views': ('views', True),
+    'positive_songs': ('sentiment', True),
+    'negative_songs': ('sentiment', False),
+    'artists_by_views': ('views', True),
+    'diverse_artists': ('lexical_diversity', True),
+}
+
+_song_struct = pa.list_(pa.struct([('title', pa.string()), ('views', pa.int64()), ('sentiment', pa.float64())]))
+REPORT_SCHEMA = pa.schema([
+    ('artist', pa.string()),
+    ('songs', pa.int64()),
+    ('views', pa.int64()),
+    ('mean_sentiment', pa.float64()),
+    ('lexical_diversity', pa.float64()),
+    ('word_count', pa.float64()),
+    ('top_emotion', pa.string()),
+    ('top_songs', _song_struct),
+    ('most_positive', _song_struct),
+    ('most_negative', _song_struct),
+    ('frequent_words', pa.list_(pa.struct([('word', pa.string()), ('count', pa.int64())]))),
+    ('emotions', pa.list_(pa.struct([('emotion', pa.string()), ('count', pa.int64())]))),
+    ('similar_artists', pa.list_(pa.struct([('artist', pa.string()), ('similarity', pa.float64())]))),
+])
+
+def plain(value):
+    """Native Python (JSON-safe) version of numpy/pandas values; NaN -> None."""
+    if isinstance(value, dict):
+        return {str(k): plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, set, np.ndarray)):
+        return [plain(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+def records(frame, index=True):
+    """Rows of `frame` (with its index if `index`) as JSON-ready dicts."""
+    return plain((frame.reset_index() if index else frame).to_dict(orient='records'))
+
+def records_schema(frame, index=True):
+    """
+    Arrow schema of records(frame, index), taken from the whole frame so
+    that every Parquet batch shares it (a batch's own inference would type
+    an all-NaN column as null).
+    """
+    schema = pa.Schema.from_pandas(frame.reset_index() if index else frame, preserve_index=False)
+    fields = [
+        field.with_type(field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ]
+    return pa.schema(fields)
+
+# ---------- ARTIST REPORTS ----------
+def all_artists():
+    return sorted(get_corpus().artist_ranges)
+
+def top_artists(n, spec=None):
+    """The n artists with the most views under `spec`."""
+    return list(top_table(spec or song_filter(), 'artists_by_views', n)['artist'])
+
+def artist_reports(artists, spec=None, workers=REPORT_WORKERS, top_n=3, n_words=10, n_similar=5):
+    """
+    Yields one report dict per artist, in completion order. Song-level
+    features for all artists come from one grouped pass; the per-artist
+    token work runs on `workers` threads.
+    """
+    spec = (spec or song_filter())._replace(artists=tuple(sorted(map(str, artists))))
+    summary, emotions = artist_summary(spec)
+    songs = top_songs(spec, top_n, min_views=MIN_VIEWS)
+
+    def songs_of(kind, artist):
+        frame = songs[kind]
+        return records(frame[frame['artist'] == artist][['title', 'views', 'sentiment']], index=False)
+
+    def report(artist):
+        row = summary.loc[artist] if artist in summary.index else None
+        words = get_most_frequent_words(spec, artist, top_n=n_words)
+        counts = emotions.loc[artist] if artist in emotions.index else pd.Series(dtype=float)
+        try:
+            similar = similar_artists(artist, n_similar)
+        except KeyError:  # artist has no songs
+            similar = pd.Series(dtype=np.float32)
+        return plain({
+            'artist': artist,
+            'songs': int(row['songs']) if row is not None else 0,
+            'views': int(row['views']) if row is not None else 0,
+            'mean_sentiment': row['mean_sentiment'] if row is not None else None,
+            'lexical_diversity': row['lexical_diversity'] if row is not None else None,
+            'word_count': row['word_count'] if row is not None else None,
+            'top_emotion': row['top_emotion'] if row is not None and isinstance(row['top_emotion'], str) else None,
+            'top_songs': songs_of('popular', artist),
+            'most_positive': songs_of('positive', artist),
+            'most_negative': songs_of('negative', artist),
+            'frequent_words': [{'word': w, 'count': c} for w, c in zip(words['Word'], words['Frequency'])],
+            'emotions': [{'emotion': e, 'count': int(c)} for e, c in counts.items() if c > 0],
+            'similar_artists': [{'artist': a, 'similarity': float(s)} for a, s in similar.items()],
+        })
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(report, artist) for artist in spec.artists]
+        for future in as_completed(futures):
+            yield future.result()
+
+# ---------- DECADES ----------
+@filter_cache()
+def decade_summary(spec, top_words=5):
+    """
+    One row per decade: songs, artists, views, mean sentiment, diversity,
+    word count, most viewed artist, dominant emotion and (if top_words)
+    the most frequent words.
+    """
+    data = filtered_songs(spec, ['artist', 'decade', 'views', 'sentiment', 'lexical_diversity', 'word_count'])
+    summary = data.groupby('decade').agg(
+        songs=('views', 'size'),
+        artists=('artist', 'nunique'),
+        views=('views', 'sum'),
+        mean_sentiment=('sentiment', 'mean'),
+        lexical_diversity=('lexical_diversity', 'mean'),
+        word_count=('word_count', 'mean'),
+    )
+    artist_views = data.groupby(['decade', 'artist'], observed=True)['views'].sum()
+    summary['top_artist'] = artist_views.groupby(level='decade').idxmax().map(lambda key: key[1])
+    emotions = get_song_emotions().reindex(data.index).fillna(0).groupby(data['decade']).sum()
+    summary['top_emotion'] = emotions.idxmax(axis=1).where(emotions.sum(axis=1) > 0)
+
+    if top_words:
+        corpus = get_corpus()
+        rows = pd.Index(corpus.song_ids).get_indexer(data.index)
+        words = {}
+        for decade, positions in data.groupby('decade').indices.items():
+            decade_rows = rows[positions]
+            words[decade] = ", ".join(corpus.top_words(decade_rows[decade_rows >= 0], top_words)[0])
+        summary['top_words'] = pd.Series(words)
+    return summary
+
+# ---------- TOP-N TABLES ----------
+@filter_cache()
+def top_table(spec, kind, n=10):
+    """Top-n songs or artists under `spec`; `kind` is one of TOP_TABLES."""
+    if kind not in TOP_TABLES:
+        raise ValueError(f"Unknown table {kind!r}; expected one of {list(TOP_TABLES)}")
+    column, largest = TOP_TABLES[kind]
+    if 'artists' in kind:
+        data = filtered_songs(spec, ['artist', 'views', 'lexical_diversity'])
+        table = data.groupby('artist', observed=True).agg(views=('views', 'sum'), songs=('views', 'size'),
+                                                          lexical_diversity=('lexical_diversity', 'mean'))
+        table = table.reset_index()
+    else:
+        table = filtered_songs(spec, SONG_COLUMNS).reset_index()
+    table = table.nlargest(n, column) if largest else table.nsmallest(n, column)
+    return table.reset_index(drop=True)
+
+# ---------- OUTPUT ----------
+def write_jsonl(rows, out):
+    """Writes dicts as JSON Lines, flushing after each one (streaming)."""
+    for row in rows:
+        out.write(json.dumps(plain(row)) + "\n")
+        out.flush()
+
+def write_parquet(rows, path, schema=None):
+    """Writes dicts to Parquet in batches of PARQUET_BATCH rows as they arrive."""
+    writer = None
+    batch = []
+
+    def flush():
+        nonlocal writer
+        table = pa.Table.from_pylist(batch, schema=schema)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table)
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= PARQUET_BATCH:
+            flush()
+    if batch or writer is None:
+        flush()
+    writer.close()
+
+def _emit(rows, fmt, output, schema=None):
+    if fmt == 'parquet':
+        if not output or output == '-':
+            raise SystemExit("--format parquet needs --output PATH")
+        write_parquet(rows, output, schema)
+    elif output and output != '-':
+        with open(output, 'w', encoding='utf-8') as f:
+            write_jsonl(rows, f)
+    else:
+        write_jsonl(rows, sys.stdout)
+
+# ---------- CLI ----------
+def use_dataset(data_dir=None, synthetic=None):
+    """Switches to the dataset directory (optionally writing a stand-in corpus) and builds the store."""
+    if data_dir:
+        os.makedirs(data_dir, exist_ok=True)
+        os.chdir(data_dir)
+    if synthetic:
+        from loader import CSV_OUTPUT
+        if not os.path.exists(CSV_OUTPUT):
+            sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+            from synthetic import write_corpus
+            write_corpus('.', synthetic)
+    ensure_store()
+
+def spec_from_args(args):
+    return song_filter(None, args.decades, args.max_words, args.query)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless lyrics analytics.")
+    parser.add_argument("--data-dir", help="directory holding the dataset/store (default: current)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="write a stand-in corpus of N songs first")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_filters(sub):
+        sub.add_argument("--decades", type=int, nargs="+")
+        sub.add_argument("--max-words", type=int)
+        sub.add_argument("--query", help="lyric search query (see search.py)")
+        sub.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+        sub.add_argument("--output", "-o", help="output file (default: stdout, JSON Lines only)")
+
+    report = commands.add_parser("report", help="per-artist reports")
+    who = report.add_mutually_exclusive_group(required=True)
+    who.add_argument("--artists", nargs="+")
+    who.add_argument("--top-artists", type=int, metavar="N", help="the N most viewed artists")
+    who.add_argument("--all-artists", action="store_true")
+    report.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    add_filters(report)
+
+    decades = commands.add_parser("decades", help="one summary row per decade")
+    add_filters(decades)
+
+    trends = commands.add_parser("trends", help="per-period statistics (see trends.py)")
+    trends.add_argument("--period", choices=list(PERIODS), default="year")
+    trends.add_argument("--by", choices=["artist"], help="one row per (artist, period)")
+    add_filters(trends)
+
+    top = commands.add_parser("top", help="top-N songs or artists")
+    top.add_argument("kind", choices=list(TOP_TABLES))
+    top.add_argument("-n", type=int, default=10)
+    add_filters(top)
+
+    serve = commands.add_parser("serve", help="local HTTP API (see api.py)")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8600)
+
+    args = parser.parse_args(argv)
+    st_logger.set_log_level('error')  # no Streamlit runtime here: skip its warnings
+    use_dataset(args.data_dir, args.synthetic)
+
+    if args.command == "serve":
+        from api import serve as serve_api
+        serve_api(args.host, args.port)
+        return
+
+    spec = spec_from_args(args)
+    if args.command == "report":
+        if args.artists:
+            artists = args.artists
+        elif args.top_artists:
+            artists = top_artists(args.top_artists, spec)
+        else:
+            artists = all_artists()
+        _emit(artist_reports(artists, spec, args.workers), args.format, args.output, REPORT_SCHEMA)
+    elif args.command == "decades":
+        summary = decade_summary(spec)
+        _emit(records(summary), args.format, args.output, records_schema(summary))
+    elif args.command == "trends":
+        trend = trend_table(spec, args.period, args.by)
+        _emit(records(trend), args.format, args.output, records_schema(trend))
+    else:
+        table = top_table(spec, args.kind, args.n)
+        _emit(records(table, index=False), args.format, args.output, records_schema(table, index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Local HTTP API over the headless analytics layer (analytics.py).
+
+    python analytics.py [--data-dir DIR] serve --port 8600
+
+GET endpoints (JSON unless noted; filters: decades=1970,1980 max_words=300 query=...):
+    /artists                          all artist names
+    /reports?artists=A,B[&workers=4]  artist reports, streamed as JSON Lines
+    /reports?top_artists=50           ... for the 50 most viewed artists
+    /decades                          one summary per decade
+    /trends?period=year[&by=artist]   trend statistics (see trends.py)
+    /top/<kind>?n=10                  a top-N table (see analytics.TOP_TABLES)
+    /search?q=...&rank=bm25&limit=50  lyric search
+    /similar/artists?name=...&n=10    similar artists
+    /similar/songs?id=...&n=10        similar songs
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import analytics
+from filters import song_filter
+from search import search_songs
+from similarity import similar_artists, similar_songs
+from trends import trend_table
+
+def _spec(params):
+    decades = [int(d) for d in params['decades'].split(',')] if params.get('decades') else None
+    max_words = int(params['max_words']) if params.get('max_words') else None
+    return song_filter(None, decades, max_words, params.get('query'))
+
+def _list(value):
+    return [item for item in value.split(',') if item] if value else []
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.0: one response per connection, so streamed bodies end at close
+    server_version = "LyricsAnalytics/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        try:
+            self.route(parts, params)
+        except (KeyError, ValueError) as e:
+            self.send_json({'error': str(e)}, status=404 if isinstance(e, KeyError) else 400)
+
+    def route(self, parts, params):
+        spec = _spec(params)
+        n = int(params.get('n', 10))
+        if parts == ['artists']:
+            self.send_json(analytics.all_artists())
+        elif parts == ['reports']:
+            artists = _list(params.get('artists'))
+            if params.get('top_artists'):
+                artists = analytics.top_artists(int(params['top_artists']), spec)
+            if not artists:
+                raise ValueError("pass artists=A,B or top_artists=N")
+            workers = int(params.get('workers', analytics.REPORT_WORKERS))
+            self.send_lines(analytics.artist_reports(artists, spec, workers))
+        elif parts == ['decades']:
+            self.send_json(analytics.records(analytics.decade_summary(spec)))
+        elif parts == ['trends']:
+            self.send_json(analytics.records(trend_table(spec, params.get('period', 'year'), params.get('by'))))
+        elif len(parts) == 2 and parts[0] == 'top':
+            self.send_json(analytics.records(analytics.top_table(spec, parts[1], n), index=False))
+        elif parts == ['search']:
+            results = search_songs(params.get('q', ''), params.get('rank', 'bm25'), int(params.get('limit', 50)))
+            self.send_json(analytics.records(results))
+        elif parts == ['similar', 'artists']:
+            scores = similar_artists(params['name'], n)
+            self.send_json(analytics.records(scores.to_frame()))
+        elif parts == ['similar', 'songs']:
+            self.send_json(analytics.records(similar_songs(int(params['id']), n)))
+        else:
+            raise KeyError(f"no such endpoint: /{'/'.join(parts)}")
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(analytics.plain(payload)).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_lines(self, rows):
+        """Streams dicts as JSON Lines, one per report as it completes."""
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        for row in rows:
+            self.wfile.write((json.dumps(row) + "\n").encode('utf-8'))
+            self.wfile.flush()
+
+def make_server(host='127.0.0.1', port=8600):
+    return ThreadingHTTPServer((host, port), Handler)
+
+def serve(host='127.0.0.1', port=8600):
+    """Serves until interrupted; the store must already be built (see analytics.use_dataset)."""
+    server = make_server(host, port)
+    print(f"Serving analytics on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -3,16 +3,31 @@ import streamlit as st
 # Must be the first Streamlit command:
 st.set_page_config(layout="wide", page_title="Rock Lyrics Dashboard", page_icon="🎸")
 
+import os
+import time
 import pandas as pd
-from loader import load_data
-from sentiment_analysis import search_sentiment_analysis, analyze_sentiment
+import profiling
+import nlp
+from loader import load_data, get_cube
+import cube as agg
+from sentiment_analysis import search_sentiment_analysis
 from artist_comparison import compare_artists
+from analytics import decade_summary
+from trends import METRICS, genre_trend
+from filters import song_filter
+from multi_artist import compare_many
+from search import search_songs
+from similarity import similar_songs
+
+SEARCH_LIMIT = 200
 
 def main():
     # --------------------
     # Data Loading
     # --------------------
-    data = load_data()
+    # Compact song metadata only; lyrics live in a separate store (see lyrics_store.py)
+    data = load_data(['artist'])
+    cube = get_cube()
 
     # --------------------
     # Header Section – Introduction
@@ -51,32 +66,52 @@ def main():
     # Sidebar – Filters
     # --------------------
     st.sidebar.header("🎚 Filters")
-    data['decade'] = data['year'].apply(lambda x: (x // 10) * 10)
 
     # Decade Filter
-    available_decades = sorted(data['decade'].unique())
+    available_decades = sorted(cube['decade'].unique())
     selected_decades = st.sidebar.multiselect("Filter by Decades", available_decades, default=available_decades)
 
-    # Artist Selection – Two Artists Only
+    # Artist Selection – a pair, or any number of artists
     artist_options = data['artist'].unique()
-    selected_artists = st.sidebar.multiselect("Select Two Artists to Compare", artist_options, max_selections=2, default=artist_options[:2])
+    compare_mode = st.sidebar.radio("Comparison Mode", ["Two artists", "Many artists"], horizontal=True)
+    many = compare_mode == "Many artists"
+    if many:
+        top_n_artists = st.sidebar.number_input("Top artists by views in the selected decades (0 = pick by hand)", 0, 50, 0)
+    if many and top_n_artists:
+        top = agg.top_artists_by_views(agg.filter_cube(cube, selected_decades, agg.WORD_COUNT_MAX), top_n=top_n_artists)
+        selected_artists = list(top.index)
+        st.sidebar.caption(", ".join(selected_artists))
+    else:
+        selected_artists = st.sidebar.multiselect(
+            "Select Artists to Compare" if many else "Select Two Artists to Compare",
+            artist_options, max_selections=None if many else 2, default=artist_options[:2],
+        )
 
     # Word Count Filter
-    word_count_filter = st.sidebar.slider("Max Word Count", min_value=50, max_value=600, value=600)
+    word_count_filter = st.sidebar.slider(
+        "Max Word Count",
+        min_value=agg.WORD_COUNT_MIN, max_value=agg.WORD_COUNT_MAX,
+        value=agg.WORD_COUNT_MAX, step=agg.WORD_COUNT_STEP,
+    )
+
+    # Lyric Search (also narrows the artist comparison)
+    search_query = st.sidebar.text_input(
+        "🔎 Search Lyrics",
+        help='Words (AND), "a phrase", OR, -word to exclude. Stopwords and words under 5 letters are ignored.',
+    )
 
     # --------------------
     # Filter Data
     # --------------------
-    filtered_data = data[data['decade'].isin(selected_decades)]
-    filtered_data = filtered_data[filtered_data['lyric_length'] <= word_count_filter]
+    # Charts read the pre-aggregated cube; only the comparison needs song rows
+    comparing = bool(selected_artists) and (len(selected_artists) >= 2 if many else len(selected_artists) == 2)
+    cube_slice = agg.filter_cube(cube, selected_decades, word_count_filter, selected_artists if comparing else None)
 
-    if selected_artists and len(selected_artists) == 2:
-        filtered_data = filtered_data[filtered_data['artist'].isin(selected_artists)]
-        # Ensure Sentiment is Applied
-        if 'sentiment' not in filtered_data.columns:
-            filtered_data = analyze_sentiment(filtered_data)
+    if comparing:
+        # A small hashable spec; the comparison caches are keyed by it
+        song_spec = song_filter(selected_artists, selected_decades, word_count_filter, search_query)
     else:
-        st.sidebar.error("Please select exactly **two artists** for comparison.")
+        st.sidebar.error("Please select at least **two artists** for comparison." if many else "Please select exactly **two artists** for comparison.")
 
     # --------------------
     # Title and Main Section
@@ -90,7 +125,7 @@ def main():
     st.subheader("📅 Number of Rock Songs by Year")
     st.markdown("This graph shows the distribution of rock songs released each year. Use the filters on the left to narrow down by decade or artist.")
 
-    yearly_counts = filtered_data.groupby('year').size()
+    yearly_counts = agg.yearly_counts(cube_slice)
     yearly_counts_df = pd.DataFrame({'Year': yearly_counts.index, 'Count': yearly_counts.values})
     st.bar_chart(yearly_counts_df.set_index('Year'), use_container_width=True)
 
@@ -102,24 +137,85 @@ def main():
 
     # Aggregate listens globally and convert to millions
     top_popular_artists = (
-        data.groupby('artist')['views'].sum()
-        .sort_values(ascending=False)
-        .head(10)
+        agg.top_artists_by_views(cube, top_n=10)
         .apply(lambda x: round(x / 1_000_000, 2))  # Convert to millions
     )
     top_popular_df = pd.DataFrame({'Artist': top_popular_artists.index, 'Views (M)': top_popular_artists.values})
     st.bar_chart(top_popular_df.set_index('Artist'), use_container_width=True)
 
+    # --------------------
+    # Visualization 3 – Lyrical Complexity by Decade
+    # --------------------
+    st.subheader("📚 Lyrical Complexity by Decade")
+    st.markdown("Average lexical diversity (unique words / total words) of all songs in each decade, computed once per song.")
+    decade_complexity = decade_summary(song_filter(), top_words=0)
+    st.bar_chart(decade_complexity['lexical_diversity'], use_container_width=True)
+
+    # --------------------
+    # Visualization 4 – Evolution of Rock (trend engine)
+    # --------------------
+    st.subheader("🧭 The Evolution of Rock")
+    st.markdown("Genre-wide trends of all songs in the selected decades and word counts: mean with 95% confidence interval and a rolling mean, plus the share of each emotion among emotion words. Periods without songs are left empty.")
+    period = st.radio("Period", ["year", "decade"], horizontal=True, format_func=str.title)
+    trend = genre_trend(selected_decades, word_count_filter, period)
+    metric = st.selectbox("Measure", METRICS, format_func=lambda m: m.replace('_', ' ').title())
+    st.line_chart(
+        trend[[f'{metric}_{s}' for s in ('mean', 'rolling', 'ci_low', 'ci_high')]]
+        .rename(columns=lambda c: c.removeprefix(f'{metric}_')),
+        use_container_width=True,
+    )
+    emotion_shares = trend[[c for c in trend.columns if c.startswith('emotion_')]]
+    st.area_chart(emotion_shares.rename(columns=lambda c: c.removeprefix('emotion_')), use_container_width=True)
+
+    # --------------------
+    # Lyric Search Results
+    # --------------------
+    if search_query.strip():
+        st.subheader("🔎 Lyric Search")
+        rank_by = st.radio("Rank by", ["bm25", "views"], horizontal=True, format_func={'bm25': "Relevance (BM25)", 'views': "Views"}.get)
+        start = time.perf_counter()
+        results = search_songs(search_query, rank_by, limit=SEARCH_LIMIT)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        st.caption(f"Top {len(results)} matches in {elapsed_ms:.1f} ms. The artist comparison below only uses matching songs.")
+        st.dataframe(results, use_container_width=True)
+        if not results.empty:
+            search_sentiment_analysis(results)
+            st.markdown("#### 🧭 Songs Like This")
+            seed = st.selectbox(
+                "Pick a result", results.index,
+                format_func=lambda song_id: f"{results.at[song_id, 'title']} – {results.at[song_id, 'artist']}",
+            )
+            st.dataframe(similar_songs(seed, top_n=10), use_container_width=True)
+
     # --------------------
     # Artist Comparison Section
     # --------------------
-    if len(selected_artists) == 2:
+    if comparing and many:
+        st.subheader("🎤 Compare a Roster of Rock Artists")
+        st.markdown("""
+        Compare any number of artists at once – pick them by hand or take the top artists of the selected decades.  
+        Every artist gets one row in the tables and one small chart per trend.
+        """)
+        with profiling.section("compare many artists"):
+            compare_many(song_spec)
+    elif comparing:
         st.subheader("🎤 Compare Two Rock Legends")
         st.markdown("""
         Select two artists from the sidebar to compare their lyrical diversity, most popular songs, and emotional tone.  
         This section dives deep into how two artists' styles contrast across different time periods.
         """)
-        compare_artists(filtered_data)
+        with profiling.section("compare artists"):
+            # The cube has no lyric-query dimension: with a search, chart the matching songs instead
+            compare_artists(song_spec, None if song_spec.query else cube_slice)
 
 if __name__ == "__main__":
-    main()
+    # NLP backends load per DASHBOARD_STARTUP (background by default)
+    nlp.start()
+    profiling.start_run()
+    try:
+        main()
+    finally:
+        rerun_ms, summary = profiling.end_run()
+    # Debug panel (default on with DASHBOARD_DEBUG=1)
+    if st.sidebar.checkbox("🛠 Show profiling panel", value=os.environ.get('DASHBOARD_DEBUG') == '1'):
+        profiling.render_panel(rerun_ms, summary)
@@ -1,131 +1,59 @@
-import nltk
-
-# Attempt to find 'punkt' & 'averaged_perceptron_tagger'.
-# If not found, quietly download them so NLTK can tokenize.
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
-try:
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('averaged_perceptron_tagger', quiet=True)
-
 import streamlit as st
 import pandas as pd
-import re
-from collections import Counter, defaultdict
+import numpy as np
 from sentiment_analysis import analyze_sentiment
-from gensim.corpora import Dictionary
-from gensim.models import LdaModel
-
-# ---------- NEW: NLTK Imports for POS & bigrams ----------
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk import pos_tag
-from nltk.collocations import BigramCollocationFinder
-from nltk.metrics import BigramAssocMeasures
-
-# Ensure nltk data is present (quiet downloads)
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-try:
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('averaged_perceptron_tagger', quiet=True)
-
-# ---------- STOPWORDS & CLEANING ----------
-stop_words = set([
-    "the", "and", "is", "in", "it", "of", "to", "on", "that", "this", "for",
-    "with", "as", "was", "at", "by", "from", "which", "an", "be", "or", "are",
-    "but", "if", "then", "so", "such", "there", "has", "have", "had", "a", "he",
-    "she", "they", "we", "you", "your", "our", "my", "their", "its", "out", "not",
-    "well", "dont", "where", "never", "youre", "gonna", "going", "could",
-    "about", "cant", "yeah", "right", "every", "little", "youre", "dont", 
-    "aint", "all", "like", "down", "just", "got", "her", "his", "im",
-    "ill", "ive", "id", "its", "one", "time", "will", "what", "come",
-    "wanna", "when", "more", "here", "want", "day", "man", "now"
-])
-
-def clean_word(w: str) -> str:
-    """Remove punctuation, make lowercase."""
-    return re.sub(r"[^\w\s]", "", w).lower()
+from cube import sentiment_by_year
+from topics import topics_for_artist
+from pos_tags import pos_distribution
+from emotions import emotion_lexicon, get_scorer, get_song_emotions
+from bigrams import get_bigram_store, count_ngrams, score_bigrams
+from profiling import profiled
+from similarity import similar_artists
+from jobs import JobRun
+from filters import filter_cache, filtered_rows, filtered_song_ids
+from trends import trend_table, trend_wide
+from ranking import MIN_VIEWS, top_songs
+
+# NLP backends (TextBlob, gensim, NLTK and its data) load lazily or in the
+# background when the app starts (see nlp.py), not when this module is imported.
+
+# ---------- STOPWORDS, CLEANING & TOKEN CORPUS ----------
+# Lyrics are tokenized once per dataset (see corpus.py); the analyses below
+# read token ids from the shared corpus instead of re-cleaning the text.
+from corpus import stop_words, clean_word
+from loader import get_corpus
+
+# Every helper below takes a SongFilter (see filters.py) instead of the
+# filtered frame; cached ones are keyed by store generation + filter spec.
 
 # ---------- (1) FREQUENT WORDS ----------
-@st.cache_data
-@st.cache_data
-def get_most_frequent_words(data, artist, top_n=10):
+@filter_cache(per_artist=True)
+def get_most_frequent_words(spec, artist, top_n=10):
     """
     Returns the top-n most frequent words for a given artist,
     ignoring words with length <5 and any in stop_words.
     """
-    lyrics_series = data[data['artist'] == artist]['lyrics'].dropna()
-    # Combine all lyrics (rows) into one big string
-    combined = " ".join(lyrics_series.astype(str))  # <-- This fixes the error
-
-    # Now tokenize that big string
-    raw_tokens = combined.split()
-
-    cleaned_tokens = []
-    for token in raw_tokens:
-        t = clean_word(token)  # remove punctuation, lowercase
-        if len(t) >= 5 and t not in stop_words:
-            cleaned_tokens.append(t)
-
-    counts = Counter(cleaned_tokens).most_common(top_n)
-    df = pd.DataFrame(counts, columns=['Word', 'Frequency'])
+    corpus = get_corpus()
+    words, freq = corpus.top_words(corpus.rows_for(artist, filtered_song_ids(spec)), top_n)
+    df = pd.DataFrame({'Word': words, 'Frequency': freq})
     df.index = df.index + 1
     return df
 
-def get_filtered_top_songs_by_sentiment(data, artist, top_n=3):
+def get_filtered_top_songs_by_sentiment(spec, artist, top_n=3):
     """Top positive & negative songs (min 1000 views)."""
-    subset = data[(data['artist'] == artist) & (data['views'] >= 1000)]
-    if subset.empty:
-        return (
-            pd.DataFrame(columns=['title','sentiment','views']),
-            pd.DataFrame(columns=['title','sentiment','views'])
-        )
-
-    top_positive = subset.sort_values(by='sentiment', ascending=False).head(top_n).reset_index(drop=True)
-    top_negative = subset.sort_values(by='sentiment').head(top_n).reset_index(drop=True)
-    return top_positive[['title','sentiment','views']], top_negative[['title','sentiment','views']]
-
-# ---------- (2) TOPIC MODELING (kept same) ----------
-@st.cache_data
-def get_topics_for_artist(data, artist, num_topics=5):
-    """Gensim LDA => 5 topics for the artist's lyrics."""
-    lyrics_list = data[data['artist'] == artist]['lyrics'].dropna().tolist()
-
-    token_docs = []
-    for lyric in lyrics_list:
-        tokens = []
-        for w in lyric.split():
-            cw = clean_word(w)
-            if len(cw) >= 5 and cw not in stop_words:
-                tokens.append(cw)
-        token_docs.append(tokens)
-
-    if not token_docs:
-        return []
-
-    dictionary = Dictionary(token_docs)
-    corpus = [dictionary.doc2bow(doc) for doc in token_docs]
-
-    try:
-        lda = LdaModel(
-            corpus=corpus,
-            num_topics=num_topics,
-            id2word=dictionary,
-            random_state=42,
-            passes=1
-        )
-    except ValueError:
-        return []
-
-    return lda.show_topics(num_topics=num_topics, num_words=5, formatted=False)
+    songs = top_songs(spec.for_artist(artist), top_n, min_views=MIN_VIEWS)
+    columns = ['title', 'sentiment', 'views']
+    return songs['positive'][columns], songs['negative'][columns]
+
+# ---------- (2) TOPIC MODELING ----------
+@profiled
+def get_topics_for_artist(spec, artist, num_topics=5):
+    """
+    Gensim LDA => 5 topics for the artist's lyrics.
+    Models are trained ahead of time on the artist's whole catalogue
+    (see topics.py), so this is a model load, not a training run.
+    """
+    return topics_for_artist(artist, num_topics)
 
 def interpret_topics_as_emotions(topics):
     """We keep the same naive logic from before or rename it if you prefer."""
@@ -137,106 +65,89 @@ def interpret_topics_as_emotions(topics):
     return results
 
 # ---------- (3) SIMPLE CUSTOM EMOTION DETECTOR ----------
-# Instead of text2emotion, define a small lexicon for 5 emotions:
-emotion_lexicon = {
-    "joy": {"happy", "joy", "delight", "laugh", "smile", "pleasure"},
-    "sadness": {"sad", "cry", "tears", "alone", "lonely", "blue", "sorrow"},
-    "anger": {"anger", "rage", "mad", "furious", "hate", "angry"},
-    "fear": {"fear", "scare", "scared", "afraid", "fright", "horror", "dread"},
-    "love": {"love", "heart", "romance", "darling", "sweet", "kiss"},
-}
-
-def find_emotions_for_artist(data, artist):
+# The lexicon is compiled into word -> emotion bitmasks and every song is
+# scored once (see emotions.py); per-artist results sum per-song vectors.
+@filter_cache(per_artist=True)
+def find_emotions_for_artist(spec, artist):
     """
-    Scan all lyrics for each artist. For each word (cleaned),
-    check if it belongs to an emotion set. Tally counts.
-    Also store the words that triggered each emotion.
+    Sum the per-song emotion counts of the artist's songs.
+    Also return the words that triggered each emotion.
     """
-    lyrics_list = data[data['artist'] == artist]['lyrics'].dropna().tolist()
-    if not lyrics_list:
+    corpus = get_corpus()
+    rows = corpus.rows_for(artist, filtered_song_ids(spec))
+    if not len(rows):
         return {}  # no data
 
-    # Tally counts, plus track which words contributed
-    emotion_counts = Counter()
-    emotion_words_map = defaultdict(set)
-
-    for lyric in lyrics_list:
-        tokens = word_tokenize(lyric.lower())
-        for tok in tokens:
-            w = clean_word(tok)
-            if len(w) < 5:
-                continue
-            # Check if w in any emotion set
-            for emotion, lexset in emotion_lexicon.items():
-                if w in lexset:
-                    emotion_counts[emotion] += 1
-                    emotion_words_map[emotion].add(w)
-
-    # Sort by frequency
-    if not emotion_counts:
+    totals = get_song_emotions().loc[corpus.song_ids[rows]].sum()
+    totals = totals[totals > 0].sort_values(ascending=False, kind='stable')
+    if totals.empty:
         return {}
 
     # Return a dict: {emotion: (count, {words...})}
+    scorer = get_scorer()
+    ids = corpus.token_ids(rows)
     result = {}
-    for emotion, cnt in emotion_counts.most_common():
-        result[emotion] = (cnt, emotion_words_map[emotion])
+    for emotion, cnt in totals.items():
+        result[emotion] = (int(cnt), set(corpus.words(scorer.words(ids, emotion))))
     return result
 
 # ---------- (4) POS DISTRIBUTION ----------
-# We'll show top 5 POS tags for each artist
-@st.cache_data
-def pos_distribution_for_artist(data, artist):
+# We'll show top 5 POS tags for each artist.
+# Songs are tagged ahead of time in batches (see pos_tags.py).
+@filter_cache(per_artist=True)
+def pos_distribution_for_artist(spec, artist):
     """
-    Tag each word in the artist's lyrics with NLTK's pos_tag,
+    Sum the stored per-song POS tag counts of the artist's songs,
     then return a distribution of the POS tags (top 5).
     """
-    lyrics = " ".join(data[data['artist'] == artist]['lyrics'].dropna())
-    tokens = word_tokenize(lyrics)
-    tagged = pos_tag(tokens)  # yields (word, POS_tag)
-    counts = Counter(tag for (_, tag) in tagged)
-    top_5 = counts.most_common(5)
-    df = pd.DataFrame(top_5, columns=["POS Tag", "Count"])
+    top_5 = pos_distribution(filtered_song_ids(spec), top_n=5)
+    df = pd.DataFrame({"POS Tag": top_5.index, "Count": top_5.values})
     df.index = df.index + 1
     return df
 
 # ---------- (5) TOP 5 BIGRAM COLLOCATIONS ----------
-@st.cache_data
-def top_bigrams_for_artist(data, artist, top_n=5):
+# Counts come from the persisted per-artist partitions (see bigrams.py);
+# a filtered slice of the artist's songs is counted from the token corpus.
+@filter_cache(per_artist=True)
+def top_bigrams_for_artist(spec, artist, top_n=5, measure='pmi'):
     """
     Find top 5 bigram collocations in the artist's lyrics
-    using NLTK's BigramCollocationFinder + PMI measure.
+    (PMI by default, bigrams seen fewer than 2 times are ignored).
     """
-    lyrics = " ".join(data[data['artist'] == artist]['lyrics'].dropna())
-    tokens = [
-        clean_word(w) for w in word_tokenize(lyrics)
-        if len(clean_word(w)) >= 5 and clean_word(w) not in stop_words
-    ]
-    if not tokens:
-        return pd.DataFrame(columns=["Bigram", "PMI"])
-
-    finder = BigramCollocationFinder.from_words(tokens)
-    # filter out bigrams that appear <2 times, for instance
-    finder.apply_freq_filter(2)
-
-    scored = finder.score_ngrams(BigramAssocMeasures.pmi)
-    top_n_scored = scored[:top_n]
-
-    # each item: ((word1, word2), pmi_score)
-    bigrams = []
-    for (w1, w2), pmi_val in top_n_scored:
-        bigrams.append((f"{w1} {w2}", round(pmi_val, 3)))
-
-    df = pd.DataFrame(bigrams, columns=["Bigram", "PMI"])
-    df.index = df.index + 1
-    return df
+    corpus = get_corpus()
+    rows = corpus.rows_for(artist, filtered_song_ids(spec))
+    start, stop = corpus.artist_ranges.get(artist, (0, 0))
+    if len(rows) == stop - start:
+        return get_bigram_store().top(f'artist:{artist}', measure, min_freq=2, top_n=top_n)
+
+    labels = np.zeros(len(rows), dtype=np.int8)
+    unigrams, bigrams = count_ngrams(corpus, rows, labels)
+    return score_bigrams(
+        corpus.vocab,
+        pd.Series(unigrams['count'].to_numpy(), index=unigrams['word'].to_numpy()),
+        bigrams['key'].to_numpy(), bigrams['count'].to_numpy(),
+        measure, min_freq=2, top_n=top_n,
+    )
+
+# ---------- (6) COMPARISON AGGREGATIONS ----------
+def get_popular_songs(spec, top_n=3):
+    """Top-n songs by views per artist (min 1000 views)."""
+    return top_songs(spec, top_n, min_views=MIN_VIEWS)['popular'][['artist', 'title', 'views']]
+
+def yearly_mean_by_artist(spec, column, statistic='mean'):
+    """
+    A yearly statistic of a per-song column ('mean', 'rolling', ...; see
+    trends.py) per artist, artists as columns; years without songs are NaN.
+    """
+    return trend_wide(trend_table(spec, 'year', by='artist'), f'{column}_{statistic}')
 
 # ------------------------------------------------------
 # MAIN compare_artists
 # ------------------------------------------------------
-def compare_artists(data):
+def compare_artists(spec, cube_slice=None):
     st.title("🎸 Artist Comparison")
 
-    unique_artists = data['artist'].unique()
+    unique_artists = [a for a in spec.artists or () if len(filtered_rows(spec.for_artist(a)))]
     if len(unique_artists) < 2:
         st.error("Not enough artists selected.")
         return
@@ -247,13 +158,7 @@ def compare_artists(data):
     # Popular Songs
     # -----------------------------------
     st.markdown("### 🔥 Most Popular Songs (Top 3 by Views)")
-    popular_songs = (
-        data[data['views'] >= 1000]
-        .sort_values(by='views', ascending=False)
-        .groupby('artist')
-        .head(3)
-        .reset_index(drop=True)
-    )
+    popular_songs = get_popular_songs(spec, top_n=3)
 
     c1, c2 = st.columns(2)
     with c1:
@@ -268,8 +173,8 @@ def compare_artists(data):
     # Top Positive/Negative
     # -----------------------------------
     st.markdown("### 🎵 Top Positive and Negative Songs (Min. 1000 Views)")
-    pos1, neg1 = get_filtered_top_songs_by_sentiment(data, artist1)
-    pos2, neg2 = get_filtered_top_songs_by_sentiment(data, artist2)
+    pos1, neg1 = get_filtered_top_songs_by_sentiment(spec, artist1)
+    pos2, neg2 = get_filtered_top_songs_by_sentiment(spec, artist2)
 
     c1, c2 = st.columns(2)
     with c1:
@@ -289,49 +194,65 @@ def compare_artists(data):
     # -----------------------------------
     st.markdown("---")
     st.markdown("### 📈 Sentiment Over Time (Yearly)")
-    senti_year = data.groupby(['year', 'artist'])['sentiment'].mean().unstack().fillna(0)
+    if cube_slice is not None:
+        senti_year = sentiment_by_year(cube_slice)  # NaN in years without songs: gaps, not dips
+    else:
+        senti_year = yearly_mean_by_artist(spec, 'sentiment')
     st.line_chart(senti_year, use_container_width=True)
 
     # -----------------------------------
     # Lexical Diversity
     # -----------------------------------
     st.markdown("### 📚 Lexical Complexity Over Time (Yearly)")
-    data['lexical_diversity'] = data['lyrics'].apply(
-        lambda x: len(set(str(x).split())) / len(str(x).split()) if x and len(str(x).split()) > 0 else 0
-    )
-    lex_year = data.groupby(['year', 'artist'])['lexical_diversity'].mean().unstack().fillna(0)
+    # Precomputed per song when the store is built (see features.py)
+    lex_year = yearly_mean_by_artist(spec, 'lexical_diversity')
     st.line_chart(lex_year, use_container_width=True)
 
     # -----------------------------------
-    # Frequent Words
+    # Heavy sections: submitted as background jobs (see jobs.py) and filled
+    # in as they complete, so everything above shows up at once
     # -----------------------------------
+    run = JobRun()
+
+    def pair_section(title, render, fn, *args, **kwargs):
+        st.markdown(title)
+        for column, artist in zip(st.columns(2), (artist1, artist2)):
+            with column:
+                st.write(f"**{artist}**")
+                run.submit(st.empty(), render, fn, *args[:1], artist, *args[1:], **kwargs)
+
+    # Frequent Words
     st.markdown("---")
-    st.markdown("### 💬 Top 10 Frequent Words")
-    c1, c2 = st.columns(2)
-    with c1:
-        st.write(f"**{artist1}**")
-        freq1 = get_most_frequent_words(data, artist1, top_n=10)
-        st.table(freq1)
+    pair_section("### 💬 Top 10 Frequent Words", st.table, get_most_frequent_words, spec, top_n=10)
 
-    with c2:
-        st.write(f"**{artist2}**")
-        freq2 = get_most_frequent_words(data, artist2, top_n=10)
-        st.table(freq2)
+    # Similar Artists (precomputed lyric vectors, see similarity.py)
+    pair_section("### 🧭 Artists with Similar Lyrics", lambda s: st.table(s.round(3)), similar_artists, top_n=5)
 
-    # -----------------------------------
     # Topic Modeling => "Unknown" labels
-    # -----------------------------------
-    
-    # -----------------------------------
+    pair_section("### 🧩 Topics (LDA)", _render_topics, get_topics_for_artist, spec)
+
     # (A) Custom Emotion Lexicon
-    # -----------------------------------
+    pair_section("### 🎭 Emotions (Lexicon)", _render_emotions, find_emotions_for_artist, spec)
 
-    # -----------------------------------
     # (B) POS Distribution
-    # -----------------------------------
-   
+    pair_section("### 🔤 Top 5 Parts of Speech", st.table, pos_distribution_for_artist, spec)
 
-    # -----------------------------------
     # (C) Top 5 Bigram Collocations
-    # -----------------------------------
-   
+    pair_section("### 🔗 Top 5 Bigram Collocations (PMI)", st.table, top_bigrams_for_artist, spec)
+
+    run.render()
+
+def _render_topics(topics):
+    if not topics:
+        st.info("Not enough lyrics for topics.")
+        return
+    st.table(pd.DataFrame(interpret_topics_as_emotions(topics), columns=["Label", "Top Words"]))
+
+def _render_emotions(emotions):
+    if not emotions:
+        st.info("No emotion words found.")
+        return
+    st.table(pd.DataFrame(
+        [(emotion, count, ", ".join(sorted(words)[:8])) for emotion, (count, words) in emotions.items()],
+        columns=["Emotion", "Count", "Example Words"],
+    ))
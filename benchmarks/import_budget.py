@@ -0,0 +1,88 @@
+"""
+Import-time budget for the first paint.
+
+Imports every project module app.py imports (read from its import
+statements, so new modules are covered) in a fresh interpreter and fails when
+that takes longer than the budget, or when a heavy NLP backend (loaded
+lazily by nlp.py) is pulled in at import time:
+
+    python benchmarks/import_budget.py [--budget 1.5] [--repeat 3]
+
+The slowest imports (from `python -X importtime`) are listed to show
+where the time went.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED_MODULES = ['nltk', 'gensim', 'textblob', 'scipy', 'gdown']
+DEFAULT_BUDGET_SECONDS = 1.5
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+def app_modules(app_path=os.path.join(ROOT, 'app.py')):
+    """Project modules imported by app.py, in import order."""
+    with open(app_path) as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names.append(node.module)
+    return [n for n in dict.fromkeys(names) if os.path.exists(os.path.join(ROOT, f'{n}.py'))]
+
+def run_child(importtime=False):
+    code = CHILD.format(root=ROOT, imports="\n".join(f"import {m}" for m in app_modules()), deferred=DEFERRED_MODULES)
+    flags = ["-X", "importtime"] if importtime else []
+    out = subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1]), out.stderr
+
+def slowest_imports(stderr, top_n=10):
+    """(cumulative seconds, module) of the slowest top-level imports."""
+    rows = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", line)
+        if match and len(match.group(2)) <= 2:  # top-level and first-level imports
+            rows.append((int(match.group(1)) / 1e6, match.group(3)))
+    return sorted(rows, reverse=True)[:top_n]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_SECONDS, help="seconds")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [run_child()[0] for _ in range(args.repeat)]
+    best = min(run['seconds'] for run in runs)
+    loaded = sorted({m for run in runs for m in run['loaded']})
+
+    _, stderr = run_child(importtime=True)
+    print(f"{'module':<40}{'cumulative s':>14}")
+    for seconds, module in slowest_imports(stderr):
+        print(f"{module:<40}{seconds:>14.3f}")
+    print(f"\nApp imports: {best:.3f} s (budget {args.budget:.3f} s)")
+
+    failed = False
+    if best > args.budget:
+        print("FAIL: import time is over budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
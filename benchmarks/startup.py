@@ -0,0 +1,71 @@
+"""
+Startup benchmark: cold load time and resident memory of the plain CSV
+path versus the columnar store (song table without lyrics, and the
+separate lyrics store).
+
+Each path runs in a fresh interpreter so nothing is warm in-process:
+
+    python benchmarks/startup.py [--repeat N]
+
+Run it from the directory holding `filtered_rock_1950_2000_cleaned.csv`.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a child process; prints a JSON line with seconds and the peak
+# RSS growth caused by the load itself (imports excluded).
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import loader
+rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {path!r} == 'csv':
+    data = loader.read_csv_data()
+elif {path!r} == 'lyrics':
+    from lyrics_store import LyricsStore
+    store = LyricsStore('rock_lyrics_store/lyrics')
+    data = store.get(store.rows).to_frame()
+else:
+    data = loader.read_store({columns!r})
+elapsed = time.perf_counter() - start
+rss_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) / 1024
+print(json.dumps({{'seconds': elapsed, 'rss_mb': rss_mb, 'rows': len(data),
+                   'frame_mb': data.memory_usage(deep=True).sum() / 2**20}}))
+"""
+
+def run_child(path, columns=None):
+    code = CHILD.format(root=ROOT, path=path, columns=columns)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    import loader
+    loader.download_csv()
+    if not loader.store_is_current():
+        loader.build_store()
+
+    cases = [
+        ("csv (all columns)", "csv", None),
+        ("store (song table)", "store", None),
+        ("lyrics store (all lyrics)", "lyrics", None),
+        ("store (metadata only)", "store", ['artist', 'year', 'decade', 'views', 'lyric_length']),
+    ]
+    print(f"{'path':<28}{'best s':>10}{'RSS growth MB':>14}{'frame MB':>11}{'rows':>10}")
+    for label, path, columns in cases:
+        runs = [run_child(path, columns) for _ in range(args.repeat)]
+        best = min(runs, key=lambda r: r['seconds'])
+        print(f"{label:<28}{best['seconds']:>10.3f}{best['rss_mb']:>14.1f}{best['frame_mb']:>11.1f}{best['rows']:>10}")
+
+if __name__ == "__main__":
+    main()
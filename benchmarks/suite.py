@@ -0,0 +1,226 @@
+"""
+Benchmark suite for every analysis entry point.
+
+Runs headless (no Streamlit server, no network) against synthetic corpora
+of several sizes. For each entry point it records the best wall time, the
+peak traced memory and the scaling slope (log-log fit of time against
+corpus size), then compares the times with a saved baseline:
+
+    python benchmarks/suite.py --save-baseline        # record a baseline
+    python benchmarks/suite.py                        # fail on regressions
+    python benchmarks/suite.py --sizes 10000 100000   # smaller run
+
+A case regresses when it is more than --tolerance slower than the
+baseline (and slower by more than --noise-floor seconds). A case the
+baseline has but this run had to skip (e.g. NLTK data missing) fails too.
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import streamlit as st
+import loader
+import sentiment_analysis
+import artist_comparison
+import topics
+import cube as agg
+import search
+import trends
+import ranking
+import pos_tags
+from filters import song_filter
+from synthetic import write_corpus
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SLICE_SONGS = 1000  # per-song NLP cases run on an artist with about this many songs
+
+def clear_caches():
+    st.cache_data.clear()
+    st.cache_resource.clear()
+
+def cases():
+    """(name, setup, run) for every entry point; setup returns run's arguments."""
+    def frame():
+        data = loader.load_data()
+        artist = data['artist'].value_counts().index[0]  # most prolific artist
+        return data, artist
+
+    def spec():
+        _, artist = frame()
+        return song_filter(), artist
+
+    def cold_topics():
+        shutil.rmtree(topics.TOPICS_DIR, ignore_errors=True)
+        return spec()
+
+    def unscored():
+        # TextBlob scores one artist's slice, so the case does not grow with the corpus
+        data, _ = frame()
+        counts = data['artist'].value_counts()
+        artist = (counts - SLICE_SONGS).abs().idxmin()
+        songs = data[data['artist'] == artist]
+        return (songs.drop(columns=['sentiment']).join(loader.get_lyrics(songs.index)),)
+
+    def tagged():
+        # The stored-count path the app uses once pos_tags.py has run
+        pos_tags.tag_store()
+        return spec()
+
+    def comparison():
+        data, _ = frame()
+        pair = list(data['artist'].value_counts().index[:2])
+        cells = agg.filter_cube(loader.get_cube(), sorted(data['decade'].unique()), agg.WORD_COUNT_MAX, pair)
+        return song_filter(pair), cells
+
+    def query():
+        corpus = loader.get_corpus()
+        first, second = corpus.words(corpus.docs([0])[0][:2])
+        search.get_search_index()  # build outside the timed run
+        return (f'{first} OR "{first} {second}"',)
+
+    def compare_aggregations(spec, cells):
+        artist_comparison.get_popular_songs(spec)
+        agg.sentiment_by_year(cells)
+        artist_comparison.yearly_mean_by_artist(spec, 'lexical_diversity')
+
+    return [
+        ('build_store', lambda: (), lambda: loader.build_store()),
+        ('load_data', lambda: (), lambda: loader.load_data()),
+        ('analyze_sentiment', unscored, sentiment_analysis.analyze_sentiment),
+        ('get_most_frequent_words', spec, artist_comparison.get_most_frequent_words),
+        ('get_topics_for_artist', cold_topics, artist_comparison.get_topics_for_artist),
+        ('find_emotions_for_artist', spec, artist_comparison.find_emotions_for_artist),
+        ('pos_distribution_for_artist', tagged, artist_comparison.pos_distribution_for_artist),
+        ('top_bigrams_for_artist', spec, artist_comparison.top_bigrams_for_artist),
+        ('compare_artists aggregations', comparison, compare_aggregations),
+        ('search_songs', query, search.search_songs),
+        ('trend_table', lambda: (song_filter(), 'year', 'artist'), trends.trend_table),
+        ('top_songs (all artists)', lambda: (song_filter(), 3, ranking.MIN_VIEWS), ranking.top_songs),
+    ]
+
+def measure(setup, run, repeat):
+    """Best wall time over `repeat` cold runs, then peak traced memory of one more."""
+    best = float('inf')
+    for _ in range(repeat):
+        clear_caches()
+        args = setup()
+        clear_caches()
+        start = time.perf_counter()
+        run(*args)
+        best = min(best, time.perf_counter() - start)
+
+    clear_caches()
+    args = setup()
+    clear_caches()
+    tracemalloc.start()
+    run(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2**20
+
+def run_suite(sizes, repeat, workdir):
+    """Results per case and size, plus the (case, size) pairs that had to be skipped."""
+    results = {}
+    skipped = []
+    for size in sizes:
+        directory = os.path.join(workdir, str(size))
+        write_corpus(directory, size)
+        os.chdir(directory)
+        loader.build_store()
+        for name, setup, run in cases():
+            try:
+                seconds, peak_mb = measure(setup, run, repeat)
+            except LookupError:  # NLTK data missing offline
+                print(f"{size:>9} {name:<30} skipped (NLTK data not installed)")
+                skipped.append((name, str(size)))
+                continue
+            results.setdefault(name, {})[str(size)] = {'seconds': seconds, 'peak_mb': peak_mb}
+            print(f"{size:>9} {name:<30} {seconds:>9.3f} s {peak_mb:>9.1f} MB")
+    return results, skipped
+
+def scaling_slope(by_size):
+    """Exponent k of time ~ size^k, fitted over all measured sizes."""
+    if len(by_size) < 2:
+        return None
+    sizes = np.array([int(s) for s in by_size], dtype=float)
+    seconds = np.array([max(r['seconds'], 1e-6) for r in by_size.values()])
+    return float(np.polyfit(np.log(sizes), np.log(seconds), 1)[0])
+
+def compare(results, baseline, tolerance, noise_floor):
+    """Regressions as (case, size, baseline s, current s)."""
+    regressions = []
+    for name, by_size in results.items():
+        for size, current in by_size.items():
+            previous = baseline.get(name, {}).get(size)
+            if previous is None:
+                continue
+            slower = current['seconds'] - previous['seconds']
+            if current['seconds'] > previous['seconds'] * (1 + tolerance) and slower > noise_floor:
+                regressions.append((name, size, previous['seconds'], current['seconds']))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action='store_true')
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--noise-floor", type=float, default=0.05)
+    parser.add_argument("--output", help="Also write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    workdir = tempfile.mkdtemp(prefix='lyrics-bench-')
+    cwd = os.getcwd()
+    try:
+        results, skipped = run_suite(args.sizes, args.repeat, workdir)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\nScaling (time ~ size^k):")
+    slopes = {name: scaling_slope(by_size) for name, by_size in results.items()}
+    for name, slope in slopes.items():
+        print(f"  {name:<30} k = {slope:.2f}" if slope is not None else f"  {name:<30} k = n/a")
+
+    report = {'results': results, 'slopes': slopes}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline to compare against (run with --save-baseline first).")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    regressions = compare(results, baseline, args.tolerance, args.noise_floor)
+    for name, size, before, now in regressions:
+        print(f"REGRESSION {name} @ {size}: {before:.3f} s -> {now:.3f} s")
+    # A case that stops running must not silently leave the comparison
+    missing = [(name, size) for name, size in skipped if size in baseline.get(name, {})]
+    for name, size in missing:
+        print(f"MISSING {name} @ {size}: in the baseline but skipped in this run")
+    failures = len(regressions) + len(missing)
+    print("\nOK" if not failures else f"\n{len(regressions)} regression(s), {len(missing)} missing case(s)")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Synthetic lyrics corpora for the benchmarks.
+
+Writes a CSV with the same columns as `filtered_rock_1950_2000_cleaned.csv`
+(plus a matching sentiment sidecar, so building the store does not spend
+its time in TextBlob). Word and artist frequencies follow Zipf laws, so the
+most prolific artist grows with the corpus like in the real data.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from loader import CSV_OUTPUT
+from sentiment_analysis import lyrics_hash, sentiment_scores_path
+
+SYLLABLES = ["ro", "ck", "lo", "ve", "he", "art", "ni", "ght", "fi", "re", "dre", "am",
+             "sw", "eet", "ba", "by", "ro", "ad", "sha", "dow", "li", "ght", "so", "ul"]
+EMOTION_WORDS = ["happy", "smile", "tears", "lonely", "angry", "horror", "afraid", "heart", "sweet", "darling"]
+FILLER_WORDS = ["the", "and", "you", "i", "me", "a", "to", "is", "it", "in", "my", "on", "baby", "yeah"]
+
+def make_vocabulary(size, seed=0):
+    rng = np.random.default_rng(seed)
+    words = set(EMOTION_WORDS)
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES, size=rng.integers(2, 5))))
+    return FILLER_WORDS + sorted(words)
+
+def make_corpus(n_songs, mean_words=80, vocab_size=20_000, seed=0):
+    """DataFrame of `n_songs` synthetic songs."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array(make_vocabulary(vocab_size, seed))
+    n_artists = max(2, n_songs // 25)
+
+    lengths = np.clip(rng.poisson(mean_words, size=n_songs), 5, None)
+    word_ids = (rng.zipf(1.2, size=lengths.sum()) - 1) % len(vocab)
+    words = vocab[word_ids]
+    bounds = np.cumsum(lengths)[:-1]
+    lyrics = [" ".join(song) for song in np.split(words, bounds)]
+
+    artist_ids = (rng.zipf(1.5, size=n_songs) - 1) % n_artists
+    return pd.DataFrame({
+        'title': [f"Song {i}" for i in range(n_songs)],
+        'artist': [f"Artist {a}" for a in artist_ids],
+        'year': rng.integers(1950, 2001, size=n_songs),
+        'views': rng.lognormal(8, 2, size=n_songs).astype(np.int64),
+        'lyrics': lyrics,
+        'language': np.where(rng.random(n_songs) < 0.9, 'en', 'fr'),
+        'lyric_length': lengths,
+    })
+
+def write_corpus(directory, n_songs, seed=0):
+    """Writes the synthetic CSV (and its sentiment sidecar) into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    data = make_corpus(n_songs, seed=seed)
+    csv_path = os.path.join(directory, CSV_OUTPUT)
+    data.to_csv(csv_path, index=False)
+
+    rng = np.random.default_rng(seed)
+    scores = pd.DataFrame({'lyrics_hash': lyrics_hash(data['lyrics']), 'sentiment': rng.uniform(-1, 1, n_songs)})
+    scores.drop_duplicates('lyrics_hash').to_csv(sentiment_scores_path(csv_path), index=False)
+    return csv_path
@@ -0,0 +1,176 @@
+"""
+Corpus-wide bigram/unigram count store.
+
+Counts are built once from the shared token corpus and partitioned per
+artist ("artist:<name>") and per decade ("decade:<year>"). PMI,
+likelihood ratio and frequency-filtered top-N are computed straight from
+the stored counts, so comparing collocations never re-tokenizes lyrics.
+Bigrams do not cross song boundaries.
+
+    python bigrams.py
+"""
+import json
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from loader import STORE_DIR, ensure_store, get_corpus, read_store
+from profiling import profiled_cache
+
+BIGRAMS_DIR = os.path.join(STORE_DIR, 'bigrams')
+BUILD_BATCH_TOKENS = 5_000_000
+MEASURES = ['pmi', 'likelihood_ratio', 'frequency']
+
+def _pair_keys(left, right):
+    return (left.astype(np.int64) << 32) | right.astype(np.int64)
+
+def _split_keys(keys):
+    return (keys >> 32).astype(np.int32), (keys & 0xFFFFFFFF).astype(np.int32)
+
+def count_ngrams(corpus, rows, labels):
+    """
+    Unigram and bigram counts of `rows`, grouped by `labels` (one partition
+    label per row). Returns two frames: (part, word, count) and (part, key, count).
+    """
+    tokens = corpus.token_ids(rows)
+    token_rows = np.repeat(np.arange(len(rows)), np.diff(corpus.offsets)[rows])
+    token_labels = np.asarray(labels)[token_rows]
+
+    unigrams = (
+        pd.DataFrame({'part': token_labels, 'word': tokens})
+        .groupby(['part', 'word']).size().rename('count').reset_index()
+    )
+    # A bigram is two consecutive tokens of the same song
+    same_song = token_rows[:-1] == token_rows[1:]
+    bigrams = (
+        pd.DataFrame({'part': token_labels[:-1][same_song], 'key': _pair_keys(tokens[:-1], tokens[1:])[same_song]})
+        .groupby(['part', 'key']).size().rename('count').reset_index()
+    )
+    return unigrams, bigrams
+
+def _batches(rows, lengths):
+    """Splits `rows` into consecutive batches of about BUILD_BATCH_TOKENS tokens."""
+    cuts = np.searchsorted(np.cumsum(lengths), np.arange(BUILD_BATCH_TOKENS, lengths.sum(), BUILD_BATCH_TOKENS))
+    return np.split(rows, cuts)
+
+def build_bigram_store(store_dir=STORE_DIR):
+    """Counts unigrams and bigrams per artist and per decade and persists them."""
+    corpus = get_corpus()
+    rows = np.arange(len(corpus.song_ids))
+    artist_labels = np.empty(len(rows), dtype=object)
+    for artist, (start, stop) in corpus.artist_ranges.items():
+        artist_labels[start:stop] = f'artist:{artist}'
+    decades = read_store(['decade'])['decade'].reindex(corpus.song_ids).to_numpy()
+    decade_labels = np.array([f'decade:{d}' for d in decades], dtype=object)
+
+    uni_parts, bi_parts = [], []
+    lengths = np.diff(corpus.offsets)
+    for batch in _batches(rows, lengths):
+        for labels in (artist_labels, decade_labels):
+            uni, bi = count_ngrams(corpus, batch, labels[batch])
+            uni_parts.append(uni)
+            bi_parts.append(bi)
+
+    # Partitions can span batches (decades always do), so sum once more
+    unigrams = pd.concat(uni_parts).groupby(['part', 'word'])['count'].sum().reset_index()
+    bigrams = pd.concat(bi_parts).groupby(['part', 'key'])['count'].sum().reset_index()
+
+    out = os.path.join(store_dir, 'bigrams')
+    os.makedirs(out, exist_ok=True)
+    unigrams.to_parquet(os.path.join(out, 'unigrams.parquet'), index=False)
+    bigrams.to_parquet(os.path.join(out, 'bigrams.parquet'), index=False)
+    with open(os.path.join(out, 'meta.json'), 'w') as f:
+        json.dump({'generation': ensure_store()}, f)
+
+class BigramStore:
+    """Partitioned unigram/bigram counts with association measures."""
+
+    def __init__(self, vocab, unigrams, bigrams):
+        self.vocab = vocab
+        self.unigrams = unigrams.sort_values('part', kind='stable').reset_index(drop=True)
+        self.bigrams = bigrams.sort_values('part', kind='stable').reset_index(drop=True)
+        self._uni_ranges = self._ranges(self.unigrams['part'])
+        self._bi_ranges = self._ranges(self.bigrams['part'])
+
+    @staticmethod
+    def _ranges(parts):
+        values = parts.to_numpy()
+        labels, starts = np.unique(values, return_index=True)
+        stops = np.append(starts[1:], len(values))
+        return {label: (start, stop) for label, start, stop in zip(labels, starts, stops)}
+
+    @property
+    def partitions(self):
+        return sorted(self._uni_ranges)
+
+    def counts(self, part):
+        """(unigram Series word_id -> count, bigram keys, bigram counts) of a partition."""
+        start, stop = self._uni_ranges.get(part, (0, 0))
+        uni = self.unigrams.iloc[start:stop]
+        start, stop = self._bi_ranges.get(part, (0, 0))
+        bi = self.bigrams.iloc[start:stop]
+        return pd.Series(uni['count'].to_numpy(), index=uni['word'].to_numpy()), bi['key'].to_numpy(), bi['count'].to_numpy()
+
+    def top(self, part, measure='pmi', min_freq=2, top_n=5):
+        """Top-N bigrams of a partition by `measure`, ignoring bigrams seen < min_freq times."""
+        unigrams, keys, counts = self.counts(part)
+        return score_bigrams(self.vocab, unigrams, keys, counts, measure, min_freq, top_n)
+
+def score_bigrams(vocab, unigrams, keys, counts, measure='pmi', min_freq=2, top_n=5):
+    """
+    Scores bigram counts the way nltk's BigramAssocMeasures does, with
+    N = total number of tokens. Ties are broken alphabetically.
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure {measure!r}; expected one of {MEASURES}")
+    keep = counts >= min_freq
+    keys, n_ii = keys[keep], counts[keep].astype(np.float64)
+    label = {'pmi': 'PMI', 'likelihood_ratio': 'Likelihood Ratio', 'frequency': 'Frequency'}[measure]
+    if not len(keys):
+        return pd.DataFrame(columns=["Bigram", label])
+
+    w1, w2 = _split_keys(keys)
+    n = float(unigrams.sum())
+    n_ix = unigrams.reindex(w1).to_numpy(dtype=np.float64)
+    n_xi = unigrams.reindex(w2).to_numpy(dtype=np.float64)
+    if measure == 'pmi':
+        scores = np.log2(n_ii * n) - np.log2(n_ix * n_xi)
+    elif measure == 'likelihood_ratio':
+        observed = [n_ii, n_xi - n_ii, n_ix - n_ii, n - n_ix - n_xi + n_ii]
+        expected = [n_ix * n_xi / n, (n - n_ix) * n_xi / n, n_ix * (n - n_xi) / n, (n - n_ix) * (n - n_xi) / n]
+        scores = np.zeros(len(keys))
+        for obs, exp in zip(observed, expected):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores += np.where(obs > 0, obs * np.log(obs / exp), 0.0)
+        scores *= 2
+    else:
+        scores = counts[keep]
+
+    frame = pd.DataFrame({'w1': vocab[w1], 'w2': vocab[w2], 'score': scores})
+    frame = frame.sort_values(['score', 'w1', 'w2'], ascending=[False, True, True]).head(top_n)
+    df = pd.DataFrame({"Bigram": frame['w1'] + " " + frame['w2'], label: frame['score'].round(3).to_numpy()})
+    df.index = np.arange(1, len(df) + 1)
+    return df
+
+def get_bigram_store():
+    """The persisted store, rebuilt first if the song store has changed since."""
+    return _cached_bigram_store(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_bigram_store(generation):
+    meta_path = os.path.join(BIGRAMS_DIR, 'meta.json')
+    current = False
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            current = json.load(f).get('generation') == generation
+    if not current:
+        build_bigram_store()
+    return BigramStore(
+        get_corpus().vocab,
+        pd.read_parquet(os.path.join(BIGRAMS_DIR, 'unigrams.parquet')),
+        pd.read_parquet(os.path.join(BIGRAMS_DIR, 'bigrams.parquet')),
+    )
+
+if __name__ == "__main__":
+    ensure_store()
+    build_bigram_store()
@@ -0,0 +1,154 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# ---------- STOPWORDS & CLEANING ----------
+stop_words = set([
+    "the", "and", "is", "in", "it", "of", "to", "on", "that", "this", "for",
+    "with", "as", "was", "at", "by", "from", "which", "an", "be", "or", "are",
+    "but", "if", "then", "so", "such", "there", "has", "have", "had", "a", "he",
+    "she", "they", "we", "you", "your", "our", "my", "their", "its", "out", "not",
+    "well", "dont", "where", "never", "youre", "gonna", "going", "could",
+    "about", "cant", "yeah", "right", "every", "little", "youre", "dont",
+    "aint", "all", "like", "down", "just", "got", "her", "his", "im",
+    "ill", "ive", "id", "its", "one", "time", "will", "what", "come",
+    "wanna", "when", "more", "here", "want", "day", "man", "now"
+])
+
+MIN_WORD_LENGTH = 5
+
+def clean_word(w: str) -> str:
+    """Remove punctuation, make lowercase."""
+    return re.sub(r"[^\w\s]", "", w).lower()
+
+# ---------- TOKENIZATION (one pass, vectorized) ----------
+def tokenize(lyrics, vocab):
+    """
+    Tokenizes a Series of lyrics the same way `clean_word` does per token
+    (whitespace split, punctuation stripped, lowercase), keeping words with
+    length >= 5 that are not stopwords.
+
+    `vocab` is a list of words; new words are appended to it in place.
+    Returns (ids, offsets): int32 token ids for all songs back to back, and
+    the int64 start of each song in `ids` (len(lyrics) + 1 entries).
+    """
+    words = (
+        lyrics.fillna("").astype(str)
+        .str.replace(r"[^\w\s]", "", regex=True)
+        .str.lower()
+        .str.split()
+    )
+    words.index = np.arange(len(words))
+    tokens = words.explode()
+    keep = (tokens.str.len() >= MIN_WORD_LENGTH) & ~tokens.isin(stop_words)
+    tokens = tokens[keep.fillna(False).astype(bool)]
+
+    known = pd.Index(vocab)
+    ids = known.get_indexer(tokens)
+    unseen = ids < 0
+    if unseen.any():
+        new_words = pd.unique(tokens[unseen])
+        vocab.extend(new_words)
+        ids[unseen] = len(known) + pd.Index(new_words).get_indexer(tokens[unseen])
+
+    counts = np.bincount(tokens.index.to_numpy(dtype=np.int64), minlength=len(words))
+    offsets = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return ids.astype(np.int32), offsets
+
+def tokens_table(song_ids, ids, offsets):
+    """Arrow table (song_id, tokens: list<int32>) for one store part."""
+    tokens = pa.ListArray.from_arrays(pa.array(offsets.astype(np.int32)), pa.array(ids, type=pa.int32()))
+    return pa.table({'song_id': pa.array(np.asarray(song_ids, dtype=np.int64)), 'tokens': tokens})
+
+def write_vocab(vocab, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(vocab))
+
+def read_vocab(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return text.split("\n") if text else []
+
+def _take_rows(ids, offsets, rows):
+    """Gathers the token ids of `rows` (in that order) from a CSR layout."""
+    starts = offsets[:-1][rows]
+    lengths = offsets[1:][rows] - starts
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    index = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return ids[index], new_offsets
+
+# ---------- TOKEN CORPUS ----------
+class TokenCorpus:
+    """
+    Token-ID corpus for the whole dataset: one int32 array of token ids per
+    song (stored back to back), a shared vocabulary, and songs ordered by
+    artist so each artist is a contiguous row range.
+    """
+
+    def __init__(self, vocab, ids, offsets, song_ids, artists):
+        order = np.argsort(artists.codes, kind='stable')
+        self.vocab = np.asarray(vocab, dtype=object)
+        self.ids, self.offsets = _take_rows(ids, offsets, order)
+        self.song_ids = np.asarray(song_ids)[order]
+        codes = artists.codes[order]
+        bounds = np.searchsorted(codes, np.arange(len(artists.categories) + 1))
+        self.artist_ranges = {
+            artist: (bounds[i], bounds[i + 1])
+            for i, artist in enumerate(artists.categories)
+            if bounds[i] < bounds[i + 1]
+        }
+
+    def rows_for(self, artist, song_ids=None):
+        """Corpus rows of `artist`, optionally limited to `song_ids` (e.g. a filtered frame's index)."""
+        start, stop = self.artist_ranges.get(artist, (0, 0))
+        rows = np.arange(start, stop)
+        if song_ids is not None:
+            rows = rows[np.isin(self.song_ids[start:stop], np.asarray(song_ids))]
+        return rows
+
+    def token_ids(self, rows):
+        """All token ids of `rows`, concatenated in row order."""
+        return _take_rows(self.ids, self.offsets, rows)[0]
+
+    def docs(self, rows):
+        """One token-id array per row."""
+        if not len(rows):
+            return []
+        ids, offsets = _take_rows(self.ids, self.offsets, rows)
+        return np.split(ids, offsets[1:-1])
+
+    def words(self, ids):
+        return self.vocab[ids]
+
+    def top_words(self, rows, top_n=10):
+        """(words, counts) of the top_n most frequent tokens of `rows`, ties in vocabulary order."""
+        uniq, freq = np.unique(self.token_ids(rows), return_counts=True)
+        top = np.argsort(-freq, kind='stable')[:top_n]
+        return self.words(uniq[top]), freq[top]
+
+def read_tokens(path):
+    """(song_ids, ids, offsets) of one token part file, or of every part in a directory."""
+    table = pq.read_table(path, memory_map=True)
+    tokens = table.column('tokens')
+    lengths = pc.list_value_length(tokens).to_numpy(zero_copy_only=False)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    ids = pc.list_flatten(tokens).to_numpy(zero_copy_only=False).astype(np.int32, copy=False)
+    return table.column('song_id').to_numpy(), ids, offsets
+
+def load_corpus(tokens_dir, vocab_path, artists):
+    """
+    Reads the persisted token parts and vocabulary.
+    `artists` is the categorical artist Series indexed by song_id.
+    """
+    song_ids, ids, offsets = read_tokens(tokens_dir)
+    song_artists = pd.Categorical(artists.reindex(song_ids))
+    return TokenCorpus(read_vocab(vocab_path), ids, offsets, song_ids, song_artists)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from profiling import profiled
+
+# ---------- PRE-AGGREGATED CUBE FOR THE SIDEBAR FILTERS ----------
+# One row per (artist, year, word-count bucket) holding song counts, view
+# sums and sentiment sums. The overview charts sum small slices of it, so
+# their cost depends on #artists x #years x #buckets, not on #songs.
+
+WORD_COUNT_MIN = 50
+WORD_COUNT_MAX = 600
+WORD_COUNT_STEP = 10
+
+MEASURES = ['songs', 'views', 'sentiment_sum']
+
+def word_count_bucket(lyric_length):
+    """
+    Upper edge of the song's word-count bucket. With the slider moving in
+    WORD_COUNT_STEP steps, `lyric_length <= w` is exactly `bucket <= w`.
+    """
+    edges = np.ceil(np.asarray(lyric_length, dtype=np.float64) / WORD_COUNT_STEP) * WORD_COUNT_STEP
+    return np.clip(edges, WORD_COUNT_MIN, WORD_COUNT_MAX + WORD_COUNT_STEP).astype(np.int16)
+
+def build_cube(data):
+    """Aggregates songs into cube cells."""
+    cells = pd.DataFrame({
+        'artist': data['artist'],
+        'year': data['year'],
+        'bucket': word_count_bucket(data['lyric_length']),
+        'songs': 1,
+        'views': data['views'].astype(np.int64),
+        'sentiment_sum': data['sentiment'].astype(np.float64),
+    })
+    return combine_cubes(cells)
+
+def combine_cubes(*cubes):
+    """Merges cubes (or raw cells) by summing the measures of matching cells."""
+    cells = pd.concat(cubes, ignore_index=True)
+    if not isinstance(cells['artist'].dtype, pd.CategoricalDtype):
+        cells['artist'] = cells['artist'].astype('category')
+    cube = (
+        cells.groupby(['artist', 'year', 'bucket'], observed=True)[MEASURES]
+        .sum()
+        .reset_index()
+    )
+    cube['decade'] = ((cube['year'] // 10) * 10).astype(np.int16)
+    return cube
+
+@profiled
+def filter_cube(cube, decades, max_words, artists=None):
+    """Cells matching the sidebar filters."""
+    mask = cube['decade'].isin(decades).to_numpy() & (cube['bucket'].to_numpy() <= max_words)
+    if artists:
+        mask &= cube['artist'].isin(artists).to_numpy()
+    return cube[mask]
+
+@profiled
+def yearly_counts(cells):
+    """Number of songs per year."""
+    return cells.groupby('year')['songs'].sum()
+
+@profiled
+def top_artists_by_views(cells, top_n=10):
+    """Artists with the highest cumulative views."""
+    views = cells.groupby('artist', observed=True)['views'].sum()
+    return views.nlargest(top_n)
+
+@profiled
+def sentiment_by_year(cells):
+    """Mean sentiment per (year, artist), artists as columns."""
+    sums = cells.groupby(['year', 'artist'], observed=True)[['sentiment_sum', 'songs']].sum()
+    return (sums['sentiment_sum'] / sums['songs']).unstack()
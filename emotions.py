@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from loader import get_corpus, ensure_store
+from profiling import profiled_cache
+
+# ---------- EMOTION LEXICON ----------
+# Instead of text2emotion, define a small lexicon for 5 emotions.
+# Any {emotion: words} mapping can be plugged into EmotionScorer instead.
+emotion_lexicon = {
+    "joy": {"happy", "joy", "delight", "laugh", "smile", "pleasure"},
+    "sadness": {"sad", "cry", "tears", "alone", "lonely", "blue", "sorrow"},
+    "anger": {"anger", "rage", "mad", "furious", "hate", "angry"},
+    "fear": {"fear", "scare", "scared", "afraid", "fright", "horror", "dread"},
+    "love": {"love", "heart", "romance", "darling", "sweet", "kiss"},
+}
+
+SCORE_BATCH = 100_000
+
+class EmotionScorer:
+    """
+    Compiles a lexicon into one bitmask per vocabulary word (bit i set if
+    the word belongs to emotion i) and scores token-id arrays with a single
+    lookup per token, so the lexicon size does not affect scoring speed.
+    """
+
+    def __init__(self, vocab, lexicon=None):
+        lexicon = lexicon or emotion_lexicon
+        self.emotions = list(lexicon)
+        if len(self.emotions) > 64:
+            raise ValueError("At most 64 emotions are supported.")
+        dtype = next(t for t in (np.uint8, np.uint16, np.uint32, np.uint64) if np.iinfo(t).bits >= len(self.emotions))
+        word_ids = pd.Index(vocab)
+        self.masks = np.zeros(len(vocab), dtype=dtype)
+        for bit, emotion in enumerate(self.emotions):
+            ids = word_ids.get_indexer(list(lexicon[emotion]))
+            self.masks[ids[ids >= 0]] |= dtype(1 << bit)
+
+    def score(self, ids, offsets):
+        """Per-song emotion counts (songs x emotions) for a CSR token layout."""
+        n_songs = len(offsets) - 1
+        counts = np.zeros((n_songs, len(self.emotions)), dtype=np.int32)
+        for start in range(0, n_songs, SCORE_BATCH):
+            stop = min(start + SCORE_BATCH, n_songs)
+            masks = self.masks[ids[offsets[start]:offsets[stop]]]
+            song = np.repeat(np.arange(stop - start), np.diff(offsets[start:stop + 1]))
+            hit = masks != 0
+            masks, song = masks[hit], song[hit]
+            for bit in range(len(self.emotions)):
+                on = (masks >> bit) & 1
+                counts[start:stop, bit] = np.bincount(song, weights=on, minlength=stop - start)
+        return counts
+
+    def words(self, ids, emotion):
+        """Distinct token ids among `ids` that belong to `emotion`."""
+        bit = self.emotions.index(emotion)
+        uniq = np.unique(ids)
+        return uniq[((self.masks[uniq] >> bit) & 1) == 1]
+
+def get_scorer():
+    """Scorer for the default lexicon over the store's vocabulary."""
+    return _cached_scorer(ensure_store())
+
+def get_song_emotions():
+    """Emotion counts for every song in the store (index song_id, one column per emotion)."""
+    return _cached_song_emotions(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_scorer(generation):
+    return EmotionScorer(get_corpus().vocab)
+
+@profiled_cache(st.cache_resource)
+def _cached_song_emotions(generation):
+    corpus = get_corpus()
+    scorer = get_scorer()
+    counts = scorer.score(corpus.ids, corpus.offsets)
+    return pd.DataFrame(counts, index=pd.Index(corpus.song_ids, name='song_id'), columns=scorer.emotions)
+
+def emotion_profile(songs, by):
+    """
+    Emotion counts summed per group, e.g. `by='artist'`, `'year'` or `'decade'`.
+    `songs` is a frame from load_data (its index selects the songs).
+    """
+    vectors = get_song_emotions().reindex(songs.index).fillna(0)
+    return vectors.groupby(songs[by], observed=True).sum()
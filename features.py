@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+# ---------- PER-SONG PRECOMPUTED FEATURES ----------
+FEATURE_CHUNK = 50_000
+
+def lexical_features(lyrics):
+    """
+    Word count and lexical diversity (unique words / total words, on the
+    raw whitespace tokens) for every lyric, computed in batched pandas passes.
+    """
+    word_count = np.zeros(len(lyrics), dtype=np.int32)
+    unique_count = np.zeros(len(lyrics), dtype=np.int32)
+    for start in range(0, len(lyrics), FEATURE_CHUNK):
+        words = lyrics.iloc[start:start + FEATURE_CHUNK].fillna("").astype(str).str.split()
+        words.index = np.arange(len(words))
+        tokens = words.explode().dropna()
+        grouped = tokens.groupby(level=0)
+        stop = start + len(words)
+        word_count[start:stop] = grouped.size().reindex(words.index, fill_value=0).to_numpy()
+        unique_count[start:stop] = grouped.nunique().reindex(words.index, fill_value=0).to_numpy()
+
+    diversity = np.divide(unique_count, word_count, out=np.zeros(len(lyrics)), where=word_count > 0)
+    return pd.DataFrame(
+        {'word_count': word_count, 'lexical_diversity': diversity.astype(np.float32)},
+        index=lyrics.index,
+    )
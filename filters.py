@@ -0,0 +1,101 @@
+"""
+Filter specs and the cache keyed by them.
+
+The sidebar selection is turned into a small, hashable `SongFilter`
+(artists, decades, max word count, lyric query). Cached analyses are keyed by the store
+generation plus that spec instead of the filtered DataFrame, so a lookup
+hashes a few strings and ints rather than every lyric. The caches are
+process-wide (shared by all sessions) and bounded: at most
+CACHE_MAX_ENTRIES entries per function, each expiring after CACHE_TTL.
+"""
+import functools
+from typing import NamedTuple, Optional
+import numpy as np
+import streamlit as st
+from loader import ensure_store, load_data
+from profiling import profiled_cache
+from search import matching_song_ids
+
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL = 60 * 60  # seconds
+FILTER_COLUMNS = ['artist', 'decade', 'lyric_length']
+
+class SongFilter(NamedTuple):
+    """Sidebar selection; None means no constraint."""
+    artists: Optional[tuple] = None
+    decades: Optional[tuple] = None
+    max_words: Optional[int] = None
+    query: Optional[str] = None  # lyric search, see search.py
+
+    def for_artist(self, artist):
+        """The same filter restricted to one artist."""
+        return self._replace(artists=(artist,))
+
+def song_filter(artists=None, decades=None, max_words=None, query=None):
+    """Canonical SongFilter: sorted tuples of plain Python values, so equal selections share keys."""
+    return SongFilter(
+        tuple(sorted(str(a) for a in artists)) if artists is not None else None,
+        tuple(sorted(int(d) for d in decades)) if decades is not None else None,
+        int(max_words) if max_words is not None else None,
+        query.strip() or None if query is not None else None,
+    )
+
+def filtered_rows(spec):
+    """Positions in load_data() of the songs matching `spec`."""
+    matches = _cached_matches(ensure_store(), spec)
+    if matches.dtype == np.uint8:
+        return np.flatnonzero(np.unpackbits(matches))  # the padding bits are 0
+    return matches.astype(np.intp)
+
+@profiled_cache(st.cache_resource, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+def _cached_matches(generation, spec):
+    """
+    The matching songs in their most compact form, so no cache entry
+    outgrows one bit per song: int32 positions if few songs match (e.g.
+    one artist), else the match mask packed into bits (np.packbits).
+    """
+    data = load_data(FILTER_COLUMNS)
+    mask = np.ones(len(data), dtype=bool)
+    if spec.artists is not None:
+        mask &= data['artist'].isin(spec.artists).to_numpy()
+    if spec.decades is not None:
+        mask &= data['decade'].isin(spec.decades).to_numpy()
+    if spec.max_words is not None:
+        mask &= data['lyric_length'].to_numpy() <= spec.max_words
+    if spec.query is not None:
+        mask &= np.isin(data.index.to_numpy(), matching_song_ids(spec.query))
+    rows = np.flatnonzero(mask)
+    if len(rows) * 32 < len(mask):
+        return rows.astype(np.int32)
+    return np.packbits(mask)
+
+def filtered_song_ids(spec):
+    """song_ids of the songs matching `spec`."""
+    return load_data(FILTER_COLUMNS).index[filtered_rows(spec)]
+
+def filtered_songs(spec, columns=None):
+    """Songs matching `spec` (a slice of load_data(columns))."""
+    return load_data(columns).iloc[filtered_rows(spec)]
+
+def filter_cache(per_artist=False):
+    """
+    Caches `fn(spec, *args)` under (store generation, spec, *args). With
+    `per_artist`, the second argument is an artist and the key uses the spec
+    narrowed to that artist, so results are reused across comparisons.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def compute(generation, spec, *args, **kwargs):
+            return fn(spec, *args, **kwargs)
+
+        cached = profiled_cache(st.cache_data, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)(compute)
+
+        @functools.wraps(fn)
+        def call(spec, *args, **kwargs):
+            if per_artist:
+                spec = spec.for_artist(args[0] if args else kwargs['artist'])
+            return cached(ensure_store(), spec, *args, **kwargs)
+
+        call.clear = cached.clear
+        return call
+    return decorate
@@ -0,0 +1,88 @@
+"""
+Incremental ingest of new lyrics into the columnar store.
+
+Reads CSV / JSONL batch files from a local directory in fixed-size chunks.
+Each chunk is cleaned, filtered to English, scored for sentiment and
+tokenized, then appended to the store as a new part (the cube and the
+vocabulary are updated in place). Peak memory depends on the chunk size,
+not on the size of the store. No network access is needed.
+
+    python ingest.py path/to/batches [--chunksize 10000]
+
+Batch files need the same columns as the main CSV
+(title, artist, year, views, lyrics, language; lyric_length is optional).
+"""
+import argparse
+import glob
+import os
+import pandas as pd
+from loader import STORE_DIR, CSV_OUTPUT, ensure_store, prepare_songs, append_part, read_meta, write_meta
+from sentiment_analysis import sentiment_scores_path
+
+BATCH_PATTERNS = ['*.csv', '*.jsonl']
+REQUIRED_COLUMNS = ['title', 'artist', 'year', 'lyrics', 'language']
+
+def iter_chunks(path, chunksize):
+    """Yields DataFrames of at most `chunksize` rows from a CSV or JSONL file."""
+    if path.endswith('.jsonl'):
+        yield from pd.read_json(path, lines=True, chunksize=chunksize)
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+def clean_chunk(chunk):
+    """Drops rows missing required fields and fills derived columns."""
+    missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"Batch is missing columns: {', '.join(missing)}")
+    chunk = chunk.dropna(subset=REQUIRED_COLUMNS)
+    chunk = chunk[chunk['lyrics'].astype(str).str.strip() != ""].copy()
+    if 'views' not in chunk.columns:
+        chunk['views'] = 0
+    chunk['views'] = chunk['views'].fillna(0)
+    if 'lyric_length' not in chunk.columns:
+        chunk['lyric_length'] = chunk['lyrics'].astype(str).str.split().str.len()
+    return chunk
+
+def ingest_file(path, store_dir=STORE_DIR, chunksize=10_000):
+    """Appends one batch file to the store; returns the number of songs added."""
+    added = 0
+    for chunk in iter_chunks(path, chunksize):
+        chunk = clean_chunk(chunk)
+        next_id = read_meta(store_dir).get('next_song_id', 0)
+        chunk.index = pd.RangeIndex(next_id, next_id + len(chunk))
+        songs = prepare_songs(chunk, sentiment_scores_path(CSV_OUTPUT))
+        append_part(songs, store_dir)
+        # Skipped (non-English) rows still consume ids, so they are never reused
+        meta = read_meta(store_dir)
+        meta['next_song_id'] = max(meta.get('next_song_id', 0), next_id + len(chunk))
+        write_meta(meta, store_dir)
+        added += len(songs)
+    return added
+
+def ingest_directory(batch_dir, store_dir=STORE_DIR, chunksize=10_000):
+    """
+    Ingests every batch file in `batch_dir` that has not been ingested yet
+    (tracked by name and modification time in the store metadata).
+    """
+    paths = sorted(p for pattern in BATCH_PATTERNS for p in glob.glob(os.path.join(batch_dir, pattern)))
+    results = {}
+    for path in paths:
+        key = f"{os.path.basename(path)}:{os.path.getmtime(path)}"
+        if key in read_meta(store_dir).get('ingested', []):
+            continue
+        results[path] = ingest_file(path, store_dir, chunksize)
+        meta = read_meta(store_dir)
+        meta['ingested'] = meta.get('ingested', []) + [key]
+        write_meta(meta, store_dir)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Append lyric batches to the columnar store.")
+    parser.add_argument("batch_dir")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    args = parser.parse_args()
+
+    if os.path.exists(CSV_OUTPUT):
+        ensure_store()
+    for path, added in ingest_directory(args.batch_dir, chunksize=args.chunksize).items():
+        print(f"{path}: {added} songs added")
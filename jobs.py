@@ -0,0 +1,146 @@
+"""
+Background jobs for the expensive analysis sections.
+
+Sections are submitted to one process-wide thread pool (the analyses are
+NumPy/pandas work that shares the in-memory corpus and caches, so threads
+rather than processes). Identical requests -- same function and arguments
+-- share one in-flight job across all sessions. A page renders its cheap
+sections straight away, leaves a placeholder for each job and fills it in
+as the job completes.
+
+When the user changes the filters, the next run submits its own jobs and
+releases the old ones: a job no session wants any more is cancelled if it
+has not started yet. A section not done after JOB_TIMEOUT seconds stops
+being waited for; a job that is already running still finishes, and its
+(cached) result shows up on the next rerun.
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import profiling
+
+JOB_WORKERS = min(8, os.cpu_count() or 1)
+JOB_TIMEOUT = 120  # seconds
+POLL_INTERVAL = 0.25  # seconds between placeholder updates
+
+class JobQueue:
+    """Thread pool with per-key deduplication of in-flight jobs."""
+
+    def __init__(self, workers=JOB_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis')
+        self._lock = threading.RLock()  # done-callbacks may run inside submit
+        self._jobs = {}    # key -> Future, while in flight
+        self._wanted = {}  # key -> ids of the sessions waiting for it
+
+    def submit(self, session, key, fn, *args, events=None, **kwargs):
+        """
+        Future for `fn(*args, **kwargs)`; joins the in-flight job with the
+        same key if any. A new job records its profiling events into
+        `events` (the submitting run's list).
+        """
+        with self._lock:
+            future = self._jobs.get(key)
+            if future is None:
+                future = self._pool.submit(_with_context, get_script_run_ctx(), events, fn, *args, **kwargs)
+                self._jobs[key] = future
+            self._wanted.setdefault(key, set()).add(session)
+            future.add_done_callback(lambda _, key=key: self._forget(key))
+        return future
+
+    def _forget(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+            self._wanted.pop(key, None)
+
+    def release(self, session, keep=()):
+        """
+        Drops `session`'s interest in its jobs outside `keep`, cancelling
+        those that nobody waits for any more and that have not started.
+        """
+        with self._lock:
+            for key, sessions in list(self._wanted.items()):
+                if key in keep or session not in sessions:
+                    continue
+                sessions.discard(session)
+                if not sessions and self._jobs[key].cancel():
+                    self._forget(key)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._jobs)
+
+def _with_context(ctx, events, fn, *args, **kwargs):
+    # Runs with the submitting run's context, so st.cache_* calls inside
+    # `fn` behave (and do not warn) as on the script thread, and their
+    # timings and cache hits land in that run's profiling panel
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    with profiling.collecting(events):
+        return fn(*args, **kwargs)
+
+@st.cache_resource
+def get_queue():
+    """The process-wide queue shared by all sessions."""
+    return JobQueue()
+
+def current_session():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else 'local'
+
+class JobRun:
+    """The jobs of one script run: submit sections, then render them as they finish."""
+
+    def __init__(self, queue=None, session=None):
+        self.queue = queue or get_queue()
+        self.session = session or current_session()
+        self.sections = []  # (key, future, placeholder, render)
+
+    def submit(self, placeholder, render, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)` in the background and later calls
+        `render(result)` inside `placeholder` (an st.empty()).
+        """
+        key = (fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+        future = self.queue.submit(self.session, key, fn, *args, events=profiling.current_events(), **kwargs)
+        placeholder.info("⏳ Computing…")
+        self.sections.append((key, future, placeholder, render))
+
+    def render(self, timeout=JOB_TIMEOUT):
+        """
+        Fills every placeholder as its job completes. Pending placeholders
+        show the elapsed time; updating them lets Streamlit stop this run
+        as soon as the user changes a filter.
+        """
+        self.queue.release(self.session, keep={key for key, *_ in self.sections})
+        by_future = {}
+        for key, future, placeholder, render in self.sections:
+            by_future.setdefault(future, []).append((placeholder, render))
+
+        start = time.perf_counter()
+        pending = set(by_future)
+        shown = 0
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                for placeholder, render in by_future[future]:
+                    with placeholder.container():
+                        try:
+                            render(future.result())
+                        except Exception as e:
+                            st.warning(f"This section could not be computed: {e}")
+            elapsed = time.perf_counter() - start
+            if int(elapsed) == shown and elapsed <= timeout:
+                continue
+            shown = int(elapsed)
+            for future in pending:
+                for placeholder, _ in by_future[future]:
+                    if elapsed > timeout:
+                        placeholder.warning("⌛ Still computing – this section will appear on the next rerun.")
+                    else:
+                        placeholder.info(f"⏳ Computing… {elapsed:.0f} s")
+            if elapsed > timeout:
+                self.queue.release(self.session, keep={key for key, future, *_ in self.sections if future not in pending})
+                break
@@ -1,30 +1,255 @@
 import streamlit as st
 import pandas as pd
-import gdown
+import pyarrow as pa
+import pyarrow.parquet as pq
 from zipfile import ZipFile
+import glob
+import json
 import os
+import shutil
+from profiling import profiled, profiled_cache
+from sentiment_analysis import update_sentiment_scores, sentiment_scores_path
+from features import lexical_features
+from cube import build_cube, combine_cubes
+from corpus import tokenize, tokens_table, read_vocab, write_vocab, load_corpus
+from lyrics_store import LyricsStore, write_lyrics_part
 
-@st.cache_data
-def load_data():
-    """
-    Downloads and loads the CSV (if not already present).
-    Filters only English lyrics.
-    """
-    file_id = "1bw3EvezRiUj9sV3vTT6OtY840pxcPpW1"
-    zip_output = 'ezyzip.zip'
-    csv_output = 'filtered_rock_1950_2000_cleaned.csv'
-    
-    # Download ZIP from Google Drive (if needed)
-    if not os.path.exists(csv_output):
-        gdown.download(f'https://drive.google.com/uc?id={file_id}&confirm=t', zip_output, quiet=False)
-        with ZipFile(zip_output, 'r') as zip_ref:
+FILE_ID = "1bw3EvezRiUj9sV3vTT6OtY840pxcPpW1"
+ZIP_OUTPUT = 'ezyzip.zip'
+CSV_OUTPUT = 'filtered_rock_1950_2000_cleaned.csv'
+
+# Columnar store built once from the CSV (English rows only, typed columns)
+# and extended in place by ingest.py. Every write appends one part file.
+# Song parts hold metadata and features only; the lyric text goes to a
+# separate compressed lyrics store (see lyrics_store.py).
+STORE_DIR = 'rock_lyrics_store'
+STORE_VERSION = 7
+CHUNK_SIZE = 50_000
+
+# Categorical columns are stored with a fixed dictionary index width: pandas
+# picks int8 codes below 128 categories, which a later part could overflow
+CATEGORY_TYPE = pa.dictionary(pa.int32(), pa.string())
+CATEGORY_COLUMNS = ['artist', 'language']
+
+# Fixed dtypes so that parts written at different times share one schema
+SONG_DTYPES = {
+    'year': 'int16',
+    'decade': 'int16',
+    'lyric_length': 'int32',
+    'views': 'int64',
+    'word_count': 'int32',
+    'sentiment': 'float32',
+    'lexical_diversity': 'float32',
+}
+
+def _songs_dir(store_dir):
+    return os.path.join(store_dir, 'songs')
+
+def _tokens_dir(store_dir):
+    return os.path.join(store_dir, 'tokens')
+
+def _lyrics_dir(store_dir):
+    return os.path.join(store_dir, 'lyrics')
+
+def _vocab_path(store_dir):
+    return os.path.join(store_dir, 'vocab.txt')
+
+def _cube_path(store_dir):
+    return os.path.join(store_dir, 'cube.parquet')
+
+def _meta_path(store_dir):
+    return os.path.join(store_dir, 'meta.json')
+
+def read_meta(store_dir=STORE_DIR):
+    if not os.path.exists(_meta_path(store_dir)):
+        return {}
+    with open(_meta_path(store_dir)) as f:
+        return json.load(f)
+
+def write_meta(meta, store_dir=STORE_DIR):
+    with open(_meta_path(store_dir), 'w') as f:
+        json.dump(meta, f)
+
+def download_csv(csv_path=CSV_OUTPUT):
+    """Downloads and unzips the CSV from Google Drive (if not already present)."""
+    if not os.path.exists(csv_path):
+        import gdown  # only needed for the one-time download
+        gdown.download(f'https://drive.google.com/uc?id={FILE_ID}&confirm=t', ZIP_OUTPUT, quiet=False)
+        with ZipFile(ZIP_OUTPUT, 'r') as zip_ref:
             zip_ref.extractall()
             st.success("File unzipped successfully!")
-    
-    # Load CSV
-    data = pd.read_csv(csv_output)
-    
-    # Filter to English Lyrics Only
-    data = data[data['language'] == 'en']
-    
+
+def read_csv_data(csv_path=CSV_OUTPUT):
+    """The plain CSV path: parse everything, then keep English lyrics only."""
+    data = pd.read_csv(csv_path)
+    return data[data['language'] == 'en'].copy()
+
+def prepare_songs(data, scores_path=None):
+    """
+    Typed, English-only song table: categorical artist/language,
+    narrow ints, precomputed decade, sentiment and lexical features.
+    """
+    data = data[data['language'] == 'en'].copy()
+    data['sentiment'] = update_sentiment_scores(data, scores_path or sentiment_scores_path(CSV_OUTPUT))
+    data['decade'] = (data['year'] // 10) * 10
+    data[['word_count', 'lexical_diversity']] = lexical_features(data['lyrics'])
+    data = data.astype(SONG_DTYPES)
+    for col in ['artist', 'language']:
+        data[col] = data[col].astype('category')
+    data.index.name = 'song_id'
     return data
+
+def _fixed_categories(table):
+    """`table` with its categorical columns cast to CATEGORY_TYPE."""
+    for col in CATEGORY_COLUMNS:
+        if col in table.column_names:
+            table = table.set_column(table.schema.get_field_index(col), col, table.column(col).cast(CATEGORY_TYPE))
+    return table
+
+def store_is_current(csv_path=CSV_OUTPUT, store_dir=STORE_DIR):
+    """True if the store exists, has the current format and is newer than the CSV."""
+    meta = read_meta(store_dir)
+    return meta.get('version') == STORE_VERSION and meta.get('source_mtime') == os.path.getmtime(csv_path)
+
+def append_part(songs, store_dir=STORE_DIR):
+    """
+    Appends prepared songs to the store as a new part: song rows (without
+    lyrics), their compressed lyrics, their token ids (extending the
+    vocabulary) and their cells in the cube.
+    Memory use depends on the size of `songs`, not of the store.
+    """
+    if songs.empty:
+        return
+    meta = read_meta(store_dir)
+    part = meta.get('parts', 0)
+    name = f'part-{part:05d}.parquet'
+    os.makedirs(_songs_dir(store_dir), exist_ok=True)
+    os.makedirs(_tokens_dir(store_dir), exist_ok=True)
+    os.makedirs(_lyrics_dir(store_dir), exist_ok=True)
+
+    # Cast before writing anything, so a part that does not fit leaves no files behind
+    table = _fixed_categories(pa.Table.from_pandas(songs.drop(columns=['lyrics']), preserve_index=True))
+    if part > 0:
+        schema = pq.read_schema(os.path.join(_songs_dir(store_dir), 'part-00000.parquet'))
+        for col in schema.names:
+            if col not in table.column_names:
+                table = table.append_column(col, pa.nulls(len(table), schema.field(col).type))
+        table = table.select(schema.names).cast(schema)
+    write_lyrics_part(songs.index, songs['lyrics'], os.path.join(_lyrics_dir(store_dir), name.replace('.parquet', '')))
+    pq.write_table(table, os.path.join(_songs_dir(store_dir), name))
+
+    # Token ids (vocabulary is append-only, so older parts stay valid)
+    vocab = read_vocab(_vocab_path(store_dir))
+    ids, offsets = tokenize(songs['lyrics'], vocab)
+    pq.write_table(tokens_table(songs.index, ids, offsets), os.path.join(_tokens_dir(store_dir), name))
+    write_vocab(vocab, _vocab_path(store_dir))
+
+    # Aggregates for the sidebar filters
+    cube = build_cube(songs)
+    if os.path.exists(_cube_path(store_dir)):
+        cube = combine_cubes(pd.read_parquet(_cube_path(store_dir)), cube)
+    cube.to_parquet(_cube_path(store_dir), index=False)
+
+    meta.update({
+        'version': STORE_VERSION,
+        'parts': part + 1,
+        'rows': meta.get('rows', 0) + len(songs),
+        'generation': meta.get('generation', 0) + 1,
+        'next_song_id': max(meta.get('next_song_id', 0), int(songs.index.max()) + 1 if len(songs) else 0),
+    })
+    write_meta(meta, store_dir)
+
+def build_store(csv_path=CSV_OUTPUT, store_dir=STORE_DIR):
+    """One-time conversion of the CSV into the columnar store (chunk by chunk)."""
+    # The generation keeps counting up across rebuilds, so caches keyed by
+    # it never mistake the new store for the old one
+    previous_generation = read_meta(store_dir).get('generation', 0)
+    shutil.rmtree(store_dir, ignore_errors=True)
+    for chunk in pd.read_csv(csv_path, chunksize=CHUNK_SIZE):
+        append_part(prepare_songs(chunk, sentiment_scores_path(csv_path)), store_dir)
+    meta = read_meta(store_dir)
+    meta['generation'] = previous_generation + meta.get('generation', 0) + 1
+    meta['source_mtime'] = os.path.getmtime(csv_path)
+    write_meta(meta, store_dir)
+
+def migrate_store(store_dir=STORE_DIR):
+    """
+    Upgrades a version-5/6 store in place, keeping ingested songs: moves
+    lyrics still inside the song parts (version 5) into the lyrics store
+    and rewrites the parts with fixed-width categorical columns.
+    """
+    os.makedirs(_lyrics_dir(store_dir), exist_ok=True)
+    for path in sorted(glob.glob(os.path.join(_songs_dir(store_dir), '*.parquet'))):
+        table = pq.read_table(path)
+        if 'lyrics' in table.column_names:
+            name = os.path.basename(path).replace('.parquet', '')
+            write_lyrics_part(table.column('song_id').to_numpy(), table.column('lyrics').to_pandas(), os.path.join(_lyrics_dir(store_dir), name))
+            table = table.drop_columns(['lyrics'])
+        pq.write_table(_fixed_categories(table), path)
+    meta = read_meta(store_dir)
+    meta.update({'version': STORE_VERSION, 'generation': meta.get('generation', 0) + 1})
+    write_meta(meta, store_dir)
+
+def ensure_store():
+    """Downloads/builds the store if needed; returns its generation (bumped on every append)."""
+    meta = read_meta()
+    if meta.get('version') in (5, 6):
+        migrate_store()
+        meta = read_meta()
+    if meta.get('version') == STORE_VERSION and not os.path.exists(CSV_OUTPUT):
+        # Store built offline from ingested batches only
+        return meta.get('generation', 0)
+    download_csv()
+    if not store_is_current():
+        build_store()
+    return read_meta().get('generation', 0)
+
+def read_store(columns=None, store_dir=STORE_DIR):
+    """Memory-maps the store and reads only `columns` (all if None)."""
+    if columns is not None:
+        columns = list(columns) + ['song_id']
+    table = pq.read_table(_songs_dir(store_dir), columns=columns, memory_map=True)
+    return table.to_pandas()
+
+@profiled
+def load_data(columns=None):
+    """
+    Downloads the CSV (if not already present) and converts it once into
+    the columnar store (English lyrics only, sentiment and decade joined).
+    Later loads read only the requested columns from the store. The song
+    table has no lyrics; fetch those by id with get_lyrics. The returned
+    frame is shared by all callers: treat it as read-only.
+    """
+    return _cached_songs(columns, ensure_store())
+
+def get_lyrics(song_ids):
+    """Lyrics of `song_ids` (a Series indexed by song_id), decompressed on demand."""
+    return _cached_lyrics(ensure_store()).get(song_ids)
+
+def get_corpus():
+    """Token-ID corpus of the whole store, shared by all analyses and sessions."""
+    return _cached_corpus(ensure_store())
+
+def get_cube():
+    """(artist, year, word-count bucket) aggregates behind the overview charts."""
+    return _cached_cube(ensure_store())
+
+# The store generation is part of each cache key, so appended parts show up.
+# Song frames are cache resources: one shared copy per column set instead of
+# an unpickled copy per call.
+@profiled_cache(st.cache_resource)
+def _cached_songs(columns, generation):
+    return read_store(columns)
+
+@profiled_cache(st.cache_resource)
+def _cached_lyrics(generation):
+    return LyricsStore(_lyrics_dir(STORE_DIR))
+
+@profiled_cache(st.cache_resource)
+def _cached_corpus(generation):
+    artists = read_store(['artist'])['artist']
+    return load_corpus(_tokens_dir(STORE_DIR), _vocab_path(STORE_DIR), artists)
+
+@profiled_cache(st.cache_resource)
+def _cached_cube(generation):
+    return pd.read_parquet(_cube_path(STORE_DIR))
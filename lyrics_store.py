@@ -0,0 +1,101 @@
+"""
+Compressed lyrics store, kept apart from the song table.
+
+Filters, groupbys and caches only touch the compact song metadata; the
+lyric text is needed by a few analyses (tagging untagged songs, scoring
+frames from elsewhere) and is fetched by song_id. Every store part has a
+lyrics part: songs in blocks of LYRICS_BLOCK, each block's UTF-8 text
+compressed on its own and written back to back into one .bin file
+(memory-mapped on load), plus an index of where each song lives. A lookup
+decompresses only the blocks holding the requested songs.
+"""
+import glob
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+LYRICS_BLOCK = 256  # songs per compressed block
+CODEC = 'zstd'
+
+def write_lyrics_part(song_ids, lyrics, path):
+    """Writes `lyrics` (aligned with `song_ids`) as `path`.bin + `path`.npz."""
+    codec = pa.Codec(CODEC)
+    texts = [text.encode('utf-8') for text in pd.Series(lyrics).fillna("").astype(str)]
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    blocks = np.arange(len(texts), dtype=np.int32) // LYRICS_BLOCK
+    stops = np.zeros(len(texts), dtype=np.int64)
+    block_sizes, raw_sizes = [], []
+    with open(f'{path}.bin', 'wb') as f:
+        for start in range(0, len(texts), LYRICS_BLOCK):
+            stops[start:start + LYRICS_BLOCK] = np.cumsum(lengths[start:start + LYRICS_BLOCK])
+            raw = b"".join(texts[start:start + LYRICS_BLOCK])
+            blob = codec.compress(raw, asbytes=True)
+            f.write(blob)
+            block_sizes.append(len(blob))
+            raw_sizes.append(len(raw))
+    np.savez(
+        f'{path}.npz',
+        song_ids=np.asarray(song_ids, dtype=np.int64),
+        blocks=blocks,
+        starts=stops - lengths,
+        stops=stops,
+        block_offsets=np.concatenate([[0], np.cumsum(block_sizes, dtype=np.int64)]),
+        raw_sizes=np.asarray(raw_sizes, dtype=np.int64),
+    )
+
+class LyricsStore:
+    """Lyrics of every stored song, decompressed block by block on request."""
+
+    def __init__(self, lyrics_dir):
+        self.codec = pa.Codec(CODEC)
+        self.parts = []  # (memory-mapped .bin, block_offsets, raw_sizes)
+        song_ids, parts, blocks, starts, stops = [], [], [], [], []
+        for number, path in enumerate(sorted(glob.glob(os.path.join(lyrics_dir, '*.npz')))):
+            index = np.load(path)
+            bin_path = path[:-len('.npz')] + '.bin'
+            data = np.memmap(bin_path, dtype=np.uint8, mode='r') if os.path.getsize(bin_path) else np.zeros(0, np.uint8)
+            self.parts.append((data, index['block_offsets'], index['raw_sizes']))
+            song_ids.append(index['song_ids'])
+            parts.append(np.full(len(index['song_ids']), number, dtype=np.int32))
+            blocks.append(index['blocks'])
+            starts.append(index['starts'])
+            stops.append(index['stops'])
+
+        def joined(arrays, dtype):
+            return np.concatenate(arrays) if arrays else np.zeros(0, dtype)
+        self.rows = pd.Index(joined(song_ids, np.int64), name='song_id')
+        self.part_of = joined(parts, np.int32)
+        self.block_of = joined(blocks, np.int32)
+        self.starts = joined(starts, np.int64)
+        self.stops = joined(stops, np.int64)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _block(self, part, block):
+        data, offsets, raw_sizes = self.parts[part]
+        return self.codec.decompress(data[offsets[block]:offsets[block + 1]], decompressed_size=raw_sizes[block], asbytes=True)
+
+    def get(self, song_ids):
+        """Lyrics of `song_ids` (in that order) as a Series indexed by song_id."""
+        song_ids = np.asarray(song_ids, dtype=np.int64)
+        rows = self.rows.get_indexer(song_ids)
+        if (rows < 0).any():
+            raise KeyError(f"No lyrics for song_ids {song_ids[rows < 0][:5].tolist()}")
+        texts = np.empty(len(rows), dtype=object)
+        keys = self.part_of[rows].astype(np.int64) << 32 | self.block_of[rows]
+        for key in np.unique(keys):
+            raw = self._block(int(key >> 32), int(key & 0xFFFFFFFF))
+            for i in np.flatnonzero(keys == key):
+                texts[i] = raw[self.starts[rows[i]]:self.stops[rows[i]]].decode('utf-8')
+        return pd.Series(texts, index=pd.Index(song_ids, name='song_id'), name='lyrics')
+
+    def blocks(self):
+        """(song_ids, lyrics list) per stored block, in store order."""
+        for part in range(len(self.parts)):
+            in_part = np.flatnonzero(self.part_of == part)
+            for block in np.unique(self.block_of[in_part]):
+                rows = in_part[self.block_of[in_part] == block]
+                raw = self._block(part, int(block))
+                yield self.rows[rows].to_numpy(), [raw[s:e].decode('utf-8') for s, e in zip(self.starts[rows], self.stops[rows])]
@@ -0,0 +1,127 @@
+"""
+Comparison of any number of artists (a label roster, a decade's top 20, ...).
+
+Song-level features (diversity, emotions) come from one grouped pass over
+the filtered songs of all selected artists; popular songs and sentiment
+extremes from one partial-selection pass (see ranking.py).
+Per-artist token work (frequent words) runs on a thread pool. Results are
+cached by filter spec (see filters.py) and shown as comparative tables and
+small multiples instead of side-by-side columns.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from emotions import get_song_emotions
+from jobs import JobRun
+from filters import filter_cache, filtered_song_ids, filtered_songs
+from loader import get_corpus
+from artist_comparison import yearly_mean_by_artist
+from ranking import MIN_VIEWS, top_songs
+
+COMPARE_WORKERS = min(8, os.cpu_count() or 1)
+SMALL_MULTIPLES_PER_ROW = 4
+
+# ---------- ENGINE ----------
+@filter_cache()
+def artist_summary(spec):
+    """
+    One row per artist (songs, views, mean sentiment, diversity, word count,
+    dominant emotion) and the summed emotion counts per artist.
+    """
+    data = filtered_songs(spec, ['artist', 'views', 'sentiment', 'lexical_diversity', 'word_count'])
+    by_artist = data.groupby('artist', observed=True)
+    summary = by_artist.agg(
+        songs=('views', 'size'),
+        views=('views', 'sum'),
+        mean_sentiment=('sentiment', 'mean'),
+        lexical_diversity=('lexical_diversity', 'mean'),
+        word_count=('word_count', 'mean'),
+    )
+    emotions = get_song_emotions().reindex(data.index).fillna(0).groupby(data['artist'], observed=True).sum()
+    summary['top_emotion'] = emotions.idxmax(axis=1).where(emotions.sum(axis=1) > 0)
+    return summary.sort_values('views', ascending=False), emotions.reindex(summary.index)
+
+@filter_cache()
+def frequent_words(spec, artists, top_n=10):
+    """Top-n words per artist (stopwords and short words removed), artists as columns."""
+    corpus = get_corpus()
+    song_ids = filtered_song_ids(spec)
+
+    def words_of(artist):
+        return corpus.top_words(corpus.rows_for(artist, song_ids), top_n)[0]
+
+    with ThreadPoolExecutor(max_workers=COMPARE_WORKERS) as pool:
+        words = list(pool.map(words_of, artists))
+    df = pd.DataFrame({artist: pd.Series(w, dtype=object) for artist, w in zip(artists, words)})
+    df.index = np.arange(1, len(df) + 1)
+    return df
+
+# ---------- VIEW ----------
+def _small_multiples(frame, height=160):
+    """One small line chart per column of `frame`, SMALL_MULTIPLES_PER_ROW per row."""
+    columns = list(frame.columns)
+    for start in range(0, len(columns), SMALL_MULTIPLES_PER_ROW):
+        for slot, artist in zip(st.columns(SMALL_MULTIPLES_PER_ROW), columns[start:start + SMALL_MULTIPLES_PER_ROW]):
+            with slot:
+                st.caption(f"**{artist}**")
+                st.line_chart(frame[artist], height=height)
+
+def compare_many(spec):
+    st.title("🎸 Multi-Artist Comparison")
+
+    summary, emotions = artist_summary(spec)
+    if len(summary) < 2:
+        st.error("Not enough artists with songs in the selected filters.")
+        return
+    artists = list(summary.index)
+
+    # -----------------------------------
+    # Overview
+    # -----------------------------------
+    st.markdown("### 📋 Overview")
+    st.dataframe(
+        summary.rename(columns={
+            'songs': 'Songs', 'views': 'Views', 'mean_sentiment': 'Mean Sentiment',
+            'lexical_diversity': 'Lexical Diversity', 'word_count': 'Mean Word Count', 'top_emotion': 'Top Emotion',
+        }).round(3),
+        use_container_width=True,
+    )
+
+    # -----------------------------------
+    # Popular Songs & Sentiment Extremes
+    # -----------------------------------
+    songs = top_songs(spec, top_n=3, min_views=MIN_VIEWS)
+    st.markdown("### 🔥 Most Popular Songs (Top 3 by Views)")
+    st.dataframe(songs['popular'][['artist', 'title', 'views']], hide_index=True, use_container_width=True)
+
+    st.markdown(f"### 🎵 Most Positive and Negative Songs (Min. {MIN_VIEWS} Views)")
+    c1, c2 = st.columns(2)
+    with c1:
+        st.dataframe(songs['positive'][['artist', 'title', 'sentiment']], hide_index=True, use_container_width=True)
+    with c2:
+        st.dataframe(songs['negative'][['artist', 'title', 'sentiment']], hide_index=True, use_container_width=True)
+
+    # -----------------------------------
+    # Over Time (small multiples)
+    # -----------------------------------
+    st.markdown("---")
+    st.markdown("### 📈 Sentiment Over Time (Yearly)")
+    _small_multiples(yearly_mean_by_artist(spec, 'sentiment')[artists])
+    st.markdown("### 📚 Lexical Complexity Over Time (Yearly)")
+    _small_multiples(yearly_mean_by_artist(spec, 'lexical_diversity')[artists])
+
+    # -----------------------------------
+    # Words & Emotions
+    # -----------------------------------
+    st.markdown("---")
+    # Token counting is the heavy part: a background job (see jobs.py)
+    run = JobRun()
+    st.markdown("### 💬 Top 10 Frequent Words")
+    run.submit(st.empty(), lambda words: st.dataframe(words, use_container_width=True), frequent_words, spec, tuple(artists), top_n=10)
+
+    st.markdown("### 🎭 Emotion Mix (Share of Emotion Words)")
+    share = emotions.div(emotions.sum(axis=1).replace(0, np.nan), axis=0).fillna(0)
+    st.bar_chart(share, use_container_width=True)
+    run.render()
@@ -0,0 +1,69 @@
+"""
+Lazy NLP backends.
+
+TextBlob, gensim and NLTK are imported inside the functions that use them,
+so importing the dashboard modules stays cheap and the overview charts draw
+before any of them load. DASHBOARD_STARTUP picks when they are loaded:
+
+    lazy        on first use by an analysis
+    background  in a daemon thread started with the app (default)
+    eager       before the first page renders
+"""
+import importlib
+import logging
+import os
+import threading
+
+STARTUP_MODE = os.environ.get('DASHBOARD_STARTUP', 'background')
+BACKEND_MODULES = ['textblob', 'gensim.models', 'nltk.tokenize', 'nltk.tag']
+# Data used by word_tokenize/pos_tag since NLTK 3.9 (the legacy pickled
+# 'punkt' and 'averaged_perceptron_tagger' packages are no longer read)
+NLTK_RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'averaged_perceptron_tagger_eng': 'taggers/averaged_perceptron_tagger_eng',
+}
+
+logger = logging.getLogger(__name__)
+_lock = threading.Lock()
+_nltk_checked = False
+_warmup = None
+
+def ensure_nltk_data():
+    """Finds (or quietly downloads) the tokenizer and tagger data, once per process."""
+    global _nltk_checked
+    with _lock:
+        if _nltk_checked:
+            return
+        import nltk
+        for name, path in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                nltk.download(name, quiet=True)
+        _nltk_checked = True
+
+def warm_up():
+    """Imports every NLP backend and checks the NLTK data."""
+    for module in BACKEND_MODULES:
+        importlib.import_module(module)
+    ensure_nltk_data()
+
+def _background_warm_up():
+    try:
+        warm_up()
+    except Exception:
+        # The analysis that needs the backend will raise it again in the foreground
+        logger.exception("Background NLP warm-up failed")
+
+def start(mode=STARTUP_MODE):
+    """Applies the startup mode. Safe to call on every rerun."""
+    global _warmup
+    if mode == 'eager':
+        warm_up()
+    elif mode == 'background':
+        with _lock:
+            if _warmup is None:
+                _warmup = threading.Thread(target=_background_warm_up, name='nlp-warm-up', daemon=True)
+                _warmup.start()
+    elif mode != 'lazy':
+        raise ValueError(f"Unknown startup mode {mode!r}; expected 'lazy', 'background' or 'eager'")
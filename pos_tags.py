@@ -0,0 +1,157 @@
+"""
+Batched part-of-speech tagging with persisted per-song tag counts.
+
+Songs are tagged in batches across a process pool and each song's POS tag
+counts are stored as one compact uint16 row (one column per Penn Treebank
+tag) under the store. Distributions for any artist, decade or filter are
+then sums over stored rows. Re-running only tags songs without counts.
+
+    python pos_tags.py [--workers N] [--batch-size 500]
+"""
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from loader import STORE_DIR, ensure_store, get_lyrics
+from lyrics_store import LyricsStore
+from profiling import profiled_cache
+from nlp import ensure_nltk_data
+
+POS_DIR = os.path.join(STORE_DIR, 'pos')
+BATCH_SIZE = 500
+
+# Penn Treebank tags as produced by nltk.pos_tag; anything else is OTHER
+TAGS = [
+    'CC', 'CD', 'DT', 'EX', 'FW', 'IN', 'JJ', 'JJR', 'JJS', 'LS', 'MD', 'NN',
+    'NNS', 'NNP', 'NNPS', 'PDT', 'POS', 'PRP', 'PRP$', 'RB', 'RBR', 'RBS', 'RP',
+    'SYM', 'TO', 'UH', 'VB', 'VBD', 'VBG', 'VBN', 'VBP', 'VBZ', 'WDT', 'WP',
+    'WP$', 'WRB', '$', "''", '``', '(', ')', ',', '--', '.', ':', '#', 'OTHER',
+]
+TAG_INDEX = {tag: i for i, tag in enumerate(TAGS)}
+
+def tag_counts(lyrics):
+    """POS tag counts (songs x TAGS, uint16) for a list of lyrics, plus the token total."""
+    from nltk import pos_tag_sents  # lazy: see nlp.py
+    from nltk.tokenize import word_tokenize
+    ensure_nltk_data()
+    sents = [word_tokenize(str(lyric)) for lyric in lyrics]
+    counts = np.zeros((len(sents), len(TAGS)), dtype=np.int64)
+    for i, tagged in enumerate(pos_tag_sents(sents)):
+        for _, tag in tagged:
+            counts[i, TAG_INDEX.get(tag, TAG_INDEX['OTHER'])] += 1
+    tokens = int(counts.sum())
+    return np.minimum(counts, np.iinfo(np.uint16).max).astype(np.uint16), tokens
+
+def _tag_batch(batch):
+    song_ids, lyrics = batch
+    counts, tokens = tag_counts(lyrics)
+    return song_ids, counts, tokens
+
+def tagged_song_ids(pos_dir=POS_DIR):
+    if not glob.glob(os.path.join(pos_dir, '*.parquet')):
+        return np.array([], dtype=np.int64)
+    return pq.read_table(pos_dir, columns=['song_id']).column('song_id').to_numpy()
+
+def _untagged_batches(store_dir, done, batch_size):
+    """(song_ids, lyrics) batches of songs without stored counts, read block by block from the lyrics store."""
+    song_ids, lyrics = [], []
+    for block_ids, block_lyrics in LyricsStore(os.path.join(store_dir, 'lyrics')).blocks():
+        todo = np.flatnonzero(~np.isin(block_ids, done))
+        song_ids.extend(block_ids[todo])
+        lyrics.extend(block_lyrics[i] for i in todo)
+        while len(song_ids) >= batch_size:
+            yield np.asarray(song_ids[:batch_size], dtype=np.int64), lyrics[:batch_size]
+            song_ids, lyrics = song_ids[batch_size:], lyrics[batch_size:]
+    if song_ids:
+        yield np.asarray(song_ids, dtype=np.int64), lyrics
+
+def tag_store(workers=None, batch_size=BATCH_SIZE, store_dir=STORE_DIR, pos_dir=POS_DIR):
+    """
+    Tags every song that has no stored counts yet and writes them as a new
+    part. Returns throughput numbers for sizing the job.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(pos_dir, exist_ok=True)
+    path = os.path.join(pos_dir, f'part-{len(glob.glob(os.path.join(pos_dir, "*.parquet"))):05d}.parquet')
+    batches = _untagged_batches(store_dir, tagged_song_ids(pos_dir), batch_size)
+
+    songs = tokens = 0
+    writer = None
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            # Keep a bounded number of batches in flight
+            while not exhausted and len(pending) < workers * 2:
+                batch = next(batches, None)
+                if batch is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_tag_batch, batch))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                song_ids, counts, batch_tokens = future.result()
+                frame = pd.DataFrame(counts, columns=TAGS)
+                frame.insert(0, 'song_id', song_ids)
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                songs += len(song_ids)
+                tokens += batch_tokens
+    if writer is not None:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        'songs': songs,
+        'tokens': tokens,
+        'seconds': round(seconds, 3),
+        'songs_per_sec': round(songs / seconds, 1) if seconds else 0.0,
+        'tokens_per_sec': round(tokens / seconds, 1) if seconds else 0.0,
+    }
+
+def get_pos_counts():
+    """Stored tag counts of all tagged songs (index song_id, one column per tag)."""
+    parts = len(glob.glob(os.path.join(POS_DIR, '*.parquet')))
+    return _cached_pos_counts(ensure_store(), parts)
+
+@profiled_cache(st.cache_resource)
+def _cached_pos_counts(generation, parts):
+    if not parts:
+        return pd.DataFrame(columns=TAGS, dtype=np.uint16, index=pd.Index([], name='song_id', dtype=np.int64))
+    return pq.read_table(POS_DIR, memory_map=True).to_pandas().set_index('song_id')
+
+def pos_distribution(song_ids, top_n=5):
+    """
+    Top POS tags summed over `song_ids`. Songs not tagged yet are tagged on
+    the fly (not persisted); only their lyrics are fetched.
+    """
+    song_ids = pd.Index(song_ids)
+    stored = get_pos_counts()
+    known = song_ids.isin(stored.index)
+    totals = stored.loc[song_ids[known]].sum(axis=0).astype(np.int64)
+    if not known.all():
+        counts, _ = tag_counts(get_lyrics(song_ids[~known]).tolist())
+        totals += counts.sum(axis=0).astype(np.int64)
+    totals = totals[totals > 0].sort_values(ascending=False, kind='stable')
+    return totals.head(top_n)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tag untagged songs and persist per-song POS counts.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    ensure_store()
+    stats = tag_store(args.workers, args.batch_size)
+    print(f"Tagged {stats['songs']} songs / {stats['tokens']} tokens in {stats['seconds']} s "
+          f"({stats['songs_per_sec']} songs/s, {stats['tokens_per_sec']} tokens/s)")
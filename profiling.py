@@ -0,0 +1,177 @@
+"""
+Hot-path instrumentation.
+
+Records, for every Streamlit rerun, per-function timings, cache hits and
+misses of the `st.cache_*` functions, the cache overhead (key hashing +
+lookup + copy: total call time minus the time spent computing) and the
+size of DataFrame arguments. The records are shown in an optional debug
+sidebar panel and written as one JSON log line per rerun to the
+`rock_dashboard.metrics` logger (to a file if DASHBOARD_METRICS_LOG is set).
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+import pandas as pd
+import streamlit as st
+
+logger = logging.getLogger('rock_dashboard.metrics')
+if os.environ.get('DASHBOARD_METRICS_LOG'):
+    _handler = logging.FileHandler(os.environ['DASHBOARD_METRICS_LOG'])
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+# Process-wide counters (all sessions), included in every log line
+totals = Counter()
+_state = threading.local()  # Streamlit runs each session's script in its own thread
+
+def _events():
+    return getattr(_state, 'events', None)
+
+def _stack():
+    if not hasattr(_state, 'stack'):
+        _state.stack = []
+    return _state.stack
+
+def _frame_sizes(args, kwargs):
+    """(rows, MB) of the DataFrame arguments (shallow memory, no string scan)."""
+    rows = size = 0
+    for value in list(args) + list(kwargs.values()):
+        if isinstance(value, pd.DataFrame):
+            rows += len(value)
+            size += value.memory_usage(index=True, deep=False).sum()
+    return rows, size / 2**20
+
+def _record(event):
+    totals[f"{event['function']}.calls"] += 1
+    if event['cache'] is not None:
+        totals[f"{event['function']}.{event['cache']}"] += 1
+    events = _events()
+    if events is not None:
+        events.append(event)
+
+def profiled(fn):
+    """Times every call of `fn` and records the size of its DataFrame arguments."""
+    name = fn.__qualname__
+
+    @functools.wraps(fn)
+    def call(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            rows, mb = _frame_sizes(args, kwargs)
+            _record({'function': name, 'ms': (time.perf_counter() - start) * 1000,
+                     'cache': None, 'overhead_ms': 0.0, 'df_rows': rows, 'df_mb': mb})
+    return call
+
+def profiled_cache(cache, **cache_kwargs):
+    """
+    Like `cache` (st.cache_data / st.cache_resource, with `cache_kwargs`),
+    but each call also records whether it was a hit or a miss and how much
+    time went into the cache itself rather than into the function body.
+    """
+    def decorate(fn):
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def compute(*args, **kwargs):
+            start = time.perf_counter()
+            result = fn(*args, **kwargs)
+            _stack()[-1]['compute'] = time.perf_counter() - start
+            return result
+
+        cached = cache(**cache_kwargs)(compute) if cache_kwargs else cache(compute)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            frame = {'compute': None}
+            _stack().append(frame)
+            start = time.perf_counter()
+            try:
+                return cached(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                _stack().pop()
+                rows, mb = _frame_sizes(args, kwargs)
+                hit = frame['compute'] is None
+                _record({'function': name, 'ms': elapsed * 1000,
+                         'cache': 'hit' if hit else 'miss',
+                         'overhead_ms': (elapsed - (frame['compute'] or 0)) * 1000,
+                         'df_rows': rows, 'df_mb': mb})
+
+        call.clear = cached.clear
+        return call
+    return decorate
+
+@contextmanager
+def section(name):
+    """Times a block of the page (e.g. one chart) as a pseudo-function."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record({'function': f'[{name}]', 'ms': (time.perf_counter() - start) * 1000,
+                 'cache': None, 'overhead_ms': 0.0, 'df_rows': 0, 'df_mb': 0.0})
+
+def start_run():
+    """Starts collecting events for the current rerun."""
+    _state.events = []
+    _state.started = time.perf_counter()
+
+def current_events():
+    """The current rerun's event list (None outside a run), to hand to other threads."""
+    return _events()
+
+@contextmanager
+def collecting(events):
+    """Records this thread's events into `events` (another thread's run) for the block."""
+    previous = _events()
+    _state.events = events
+    try:
+        yield
+    finally:
+        _state.events = previous
+
+def end_run():
+    """Stops collecting; logs the rerun as one JSON line and returns its summary."""
+    events = list(_events() or [])  # background jobs may still append
+    _state.events = None
+    summary = summarize(events)
+    run = {
+        'ts': time.time(),
+        'rerun_ms': round((time.perf_counter() - getattr(_state, 'started', time.perf_counter())) * 1000, 3),
+        'functions': summary.reset_index().to_dict(orient='records'),
+        'totals': dict(totals),
+    }
+    logger.info(json.dumps(run, default=float))
+    return run['rerun_ms'], summary
+
+def summarize(events):
+    """Per-function totals for one rerun."""
+    columns = ['calls', 'total ms', 'hits', 'misses', 'cache overhead ms', 'max df rows', 'max df MB']
+    if not events:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame(events)
+    grouped = frame.groupby('function', sort=False)
+    summary = pd.DataFrame({
+        'calls': grouped.size(),
+        'total ms': grouped['ms'].sum().round(2),
+        'hits': grouped['cache'].apply(lambda c: int((c == 'hit').sum())),
+        'misses': grouped['cache'].apply(lambda c: int((c == 'miss').sum())),
+        'cache overhead ms': grouped['overhead_ms'].sum().round(2),
+        'max df rows': grouped['df_rows'].max(),
+        'max df MB': grouped['df_mb'].max().round(2),
+    })
+    return summary.sort_values('total ms', ascending=False)
+
+def render_panel(rerun_ms, summary):
+    """Optional debug panel in the sidebar."""
+    with st.sidebar.expander("🛠 Profiling (this rerun)", expanded=True):
+        st.write(f"**Rerun:** {rerun_ms:.1f} ms")
+        st.dataframe(summary, use_container_width=True)
@@ -0,0 +1,92 @@
+"""
+Top-N songs per artist without sorting whole frames.
+
+The songs of load_data() are indexed by artist once per store generation
+(one contiguous partition of row positions per artist). A top-N query
+walks the partitions of the requested artists, keeps the songs matching
+the filter and picks the n best with a partial selection (np.partition);
+only those n get sorted. The most viewed, most positive and most negative
+songs of any number of artists come out of the same pass.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from filters import filter_cache, filtered_rows
+from loader import ensure_store, load_data
+from profiling import profiled_cache
+
+MIN_VIEWS = 1000
+RANK_COLUMNS = ['artist', 'title', 'views', 'sentiment']
+TOP_KINDS = {
+    # kind: (column, largest first)
+    'popular': ('views', True),
+    'positive': ('sentiment', True),
+    'negative': ('sentiment', False),
+}
+
+def top_positions(values, n, largest=True):
+    """
+    Positions of the n largest (or smallest) `values`, best first; ties
+    keep their order in `values`, as with a stable sort. NaNs come last.
+    """
+    key = -values if largest else values
+    if key.dtype.kind == 'f':
+        key = np.where(np.isnan(key), np.inf, key)
+    if len(key) > n:
+        kth = np.partition(key, n - 1)[n - 1]
+        better = np.flatnonzero(key < kth)
+        ties = np.flatnonzero(key == kth)[:n - len(better)]
+        positions = np.concatenate([better, ties])
+    else:
+        positions = np.arange(len(key))
+    return positions[np.lexsort((positions, key[positions]))]
+
+class ArtistPartitions:
+    """Row positions in load_data() grouped by artist."""
+
+    def __init__(self, artists):
+        codes, names = pd.factorize(artists, sort=True)
+        self.order = np.argsort(codes, kind='stable')  # positions ascending within an artist
+        self.bounds = np.searchsorted(codes[self.order], np.arange(len(names) + 1))
+        self.codes = {str(name): i for i, name in enumerate(names)}
+        self.artists = [str(name) for name in names]
+
+    def rows(self, artist):
+        """Positions of `artist`'s songs (ascending); empty for an unknown artist."""
+        code = self.codes.get(artist)
+        if code is None:
+            return self.order[:0]
+        return self.order[self.bounds[code]:self.bounds[code + 1]]
+
+def get_artist_partitions():
+    return _cached_partitions(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_partitions(generation):
+    return ArtistPartitions(load_data(['artist'])['artist'])
+
+@filter_cache()
+def top_songs(spec, top_n=3, min_views=0):
+    """
+    Top-n most viewed, most positive and most negative songs per artist
+    (all artists if the spec names none) with at least `min_views` views,
+    as frames keyed 'popular', 'positive', 'negative': artists in name
+    order, best song first.
+    """
+    data = load_data(RANK_COLUMNS)
+    keep = np.zeros(len(data), dtype=bool)
+    keep[filtered_rows(spec)] = True
+    keep &= data['views'].to_numpy() >= min_views
+    values = {column: data[column].to_numpy() for column, _ in TOP_KINDS.values()}
+
+    partitions = get_artist_partitions()
+    picked = {kind: [] for kind in TOP_KINDS}
+    for artist in spec.artists if spec.artists is not None else partitions.artists:
+        rows = partitions.rows(artist)
+        rows = rows[keep[rows]]
+        for kind, (column, largest) in TOP_KINDS.items():
+            picked[kind].append(rows[top_positions(values[column][rows], top_n, largest)])
+    return {
+        kind: data.iloc[np.concatenate(rows) if rows else []].reset_index(drop=True)
+        for kind, rows in picked.items()
+    }
@@ -0,0 +1,226 @@
+"""
+Full-text lyric search over a prebuilt positional inverted index.
+
+The index is built from the shared token corpus, so words are cleaned the
+same way (`clean_word`, stopwords and words shorter than MIN_WORD_LENGTH
+dropped) and phrase positions count cleaned tokens only. Postings are
+sorted by term, then song, then position, and persisted as flat arrays
+under the store (memory-mapped on load).
+
+Query syntax:
+    thunder night            both words (AND)
+    "lonely night"           phrase
+    thunder OR lightning     either side
+    thunder -night           exclude (also NOT night)
+
+Results are ranked by BM25 or by views.
+
+    python search.py [query] [--rank bm25|views] [--limit 20]
+"""
+import argparse
+import json
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+import streamlit as st
+from corpus import MIN_WORD_LENGTH, clean_word, stop_words
+from loader import STORE_DIR, ensure_store, get_corpus, load_data
+from profiling import profiled, profiled_cache
+
+SEARCH_DIR = os.path.join(STORE_DIR, 'search')
+BM25_K1 = 1.2
+BM25_B = 0.75
+RANKINGS = ['bm25', 'views']
+RESULT_COLUMNS = ['title', 'artist', 'year', 'views', 'sentiment']
+
+# ---------- INDEX ----------
+def build_search_index(store_dir=STORE_DIR):
+    """Builds the positional index of the whole corpus and persists it."""
+    corpus = get_corpus()
+    lengths = np.diff(corpus.offsets)
+    rows = np.repeat(np.arange(len(lengths), dtype=np.int32), lengths)
+    positions = np.arange(len(corpus.ids), dtype=np.int64) - np.repeat(corpus.offsets[:-1], lengths)
+    order = np.argsort(corpus.ids, kind='stable')  # keeps (row, position) order within a term
+    term_offsets = np.zeros(len(corpus.vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(corpus.ids, minlength=len(corpus.vocab)), out=term_offsets[1:])
+
+    out = os.path.join(store_dir, 'search')
+    os.makedirs(out, exist_ok=True)
+    np.save(os.path.join(out, 'term_offsets.npy'), term_offsets)
+    np.save(os.path.join(out, 'rows.npy'), rows[order])
+    np.save(os.path.join(out, 'positions.npy'), positions[order].astype(np.min_scalar_type(max(lengths.max(initial=0), 1))))
+    np.save(os.path.join(out, 'doc_lengths.npy'), lengths.astype(np.int32))
+    np.save(os.path.join(out, 'song_ids.npy'), corpus.song_ids)
+    with open(os.path.join(out, 'meta.json'), 'w') as f:
+        json.dump({'generation': ensure_store()}, f)
+
+class SearchIndex:
+    """Positional postings (term -> rows, positions) with BM25 scoring."""
+
+    def __init__(self, vocab, term_offsets, rows, positions, doc_lengths, song_ids):
+        self.term_ids = {word: i for i, word in enumerate(vocab)}
+        self.term_offsets = term_offsets
+        self.rows = rows
+        self.positions = positions
+        self.doc_lengths = doc_lengths
+        self.song_ids = song_ids
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def postings(self, word):
+        """(rows, positions) of a cleaned word; empty if it is not in the vocabulary."""
+        term = self.term_ids.get(word)
+        if term is None:
+            return self.rows[:0], self.positions[:0]
+        start, stop = self.term_offsets[term], self.term_offsets[term + 1]
+        return self.rows[start:stop], self.positions[start:stop]
+
+    def matches(self, words):
+        """
+        (rows, term frequency) of a term (one word) or phrase (several words),
+        rows ascending.
+        """
+        rows, positions = self.postings(words[0])
+        # Key each occurrence by (row, start position); a phrase needs every
+        # word at start + offset
+        keys = (rows.astype(np.int64) << 32) | positions.astype(np.int64)
+        for offset, word in enumerate(words[1:], start=1):
+            rows_i, positions_i = self.postings(word)
+            starts = positions_i.astype(np.int64) - offset
+            keep = starts >= 0
+            keys_i = (rows_i[keep].astype(np.int64) << 32) | starts[keep]
+            keys = np.intersect1d(keys, keys_i, assume_unique=True)
+        matched_rows, tf = np.unique(keys >> 32, return_counts=True)
+        return matched_rows.astype(np.int32), tf
+
+    def bm25(self, rows, tf, df):
+        """BM25 weight of a term/phrase with document frequency `df` in `rows`."""
+        n = len(self.doc_lengths)
+        idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[rows] / max(self.avg_length, 1e-9))
+        return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(self, query):
+        """song_ids matching `query` and their BM25 scores (unordered)."""
+        rows_out, scores_out = [], []
+        for required, excluded in parse_query(query):
+            if not required:
+                continue
+            rows = scores = None
+            for words in required:
+                matched, tf = self.matches(words)
+                weight = self.bm25(matched, tf, len(matched))
+                if rows is None:
+                    rows, scores = matched, weight
+                else:
+                    keep_old = np.isin(rows, matched, assume_unique=True)
+                    keep_new = np.isin(matched, rows, assume_unique=True)
+                    rows, scores = rows[keep_old], scores[keep_old] + weight[keep_new]
+            for words in excluded:
+                keep = ~np.isin(rows, self.matches(words)[0], assume_unique=True)
+                rows, scores = rows[keep], scores[keep]
+            rows_out.append(rows)
+            scores_out.append(scores)
+
+        if not rows_out:
+            return pd.Series(dtype=np.float64, index=pd.Index([], name='song_id', dtype=np.int64), name='score')
+        # OR: scores of all clauses a song matches add up
+        scores = pd.Series(np.concatenate(scores_out), index=np.concatenate(rows_out)).groupby(level=0).sum()
+        return pd.Series(scores.to_numpy(), index=pd.Index(self.song_ids[scores.index], name='song_id'), name='score')
+
+# ---------- QUERIES ----------
+def _clean_terms(text):
+    words = (clean_word(w) for w in text.split())
+    return [w for w in words if len(w) >= MIN_WORD_LENGTH and w not in stop_words]
+
+def parse_query(query):
+    """
+    Parses a query into OR-ed clauses of (required, excluded) items, each
+    item a list of cleaned words (one word = term, several = phrase).
+    Words the index does not keep (stopwords, short words) are dropped.
+    """
+    clauses, required, excluded = [], [], []
+    negate_next = False
+    for token in re.findall(r'-?"[^"]*"|\S+', query):
+        if token == 'OR':
+            clauses.append((required, excluded))
+            required, excluded = [], []
+            continue
+        if token == 'NOT':
+            negate_next = True
+            continue
+        negate = negate_next or (token.startswith('-') and len(token) > 1)
+        negate_next = False
+        words = _clean_terms(token.lstrip('-').strip('"'))
+        if not words:
+            continue
+        if token.lstrip('-').startswith('"'):
+            items = [words]  # one phrase
+        else:
+            items = [[w] for w in words]  # e.g. "rock-n-roll" cleans to one word
+        (excluded if negate else required).extend(items)
+    clauses.append((required, excluded))
+    return clauses
+
+def get_search_index():
+    """The persisted index, rebuilt first if the song store has changed since."""
+    return _cached_search_index(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_search_index(generation):
+    meta_path = os.path.join(SEARCH_DIR, 'meta.json')
+    current = False
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            current = json.load(f).get('generation') == generation
+    if not current:
+        build_search_index()
+
+    def load(name):
+        return np.load(os.path.join(SEARCH_DIR, f'{name}.npy'), mmap_mode='r')
+    return SearchIndex(
+        get_corpus().vocab, load('term_offsets'), load('rows'), load('positions'),
+        load('doc_lengths'), load('song_ids'),
+    )
+
+def matching_song_ids(query):
+    """song_ids of every song matching `query` (sorted)."""
+    return np.sort(get_search_index().search(query).index.to_numpy())
+
+@profiled
+def search_songs(query, rank_by='bm25', limit=50):
+    """
+    Top `limit` matches of `query` with their metadata, indexed by song_id
+    like load_data, so the result can go straight into the sentiment views.
+    """
+    if rank_by not in RANKINGS:
+        raise ValueError(f"Unknown ranking {rank_by!r}; expected one of {RANKINGS}")
+    scores = get_search_index().search(query)
+    songs = load_data(RESULT_COLUMNS)
+    views = songs['views'].reindex(scores.index).to_numpy()
+    key = scores.to_numpy() if rank_by == 'bm25' else views
+    if limit is not None and len(key) > limit:
+        top = np.argpartition(-key, limit - 1)[:limit]
+    else:
+        top = np.arange(len(key))
+    top = top[np.lexsort((-views[top], -key[top]))]
+    results = songs.loc[scores.index[top]].copy()
+    results['score'] = scores.to_numpy()[top].round(3)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the lyric search index, optionally run a query.")
+    parser.add_argument("query", nargs="?")
+    parser.add_argument("--rank", choices=RANKINGS, default='bm25')
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    ensure_store()
+    if args.query is None:
+        build_search_index()
+    else:
+        start = time.perf_counter()
+        results = search_songs(args.query, args.rank, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(results.to_string())
+        print(f"\n{len(results)} results in {elapsed:.1f} ms")
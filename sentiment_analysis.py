@@ -1,16 +1,161 @@
 import streamlit as st
-from textblob import TextBlob
 import pandas as pd
+import numpy as np
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from profiling import profiled
 
-@st.cache_data
+# ---------- OFFLINE SCORING ----------
+# Polarity is scored once per distinct lyric and persisted in a sidecar CSV
+# (lyrics_hash, sentiment) next to the dataset, so reruns only join it back.
+
+def lyrics_hash(lyrics):
+    """Content hash (uint64) for each lyric, independent of the row index."""
+    return pd.util.hash_pandas_object(lyrics.fillna("").astype(str), index=False)
+
+def _polarity(text):
+    from textblob import TextBlob  # lazy: see nlp.py
+    return TextBlob(text).sentiment.polarity
+
+def score_polarity(texts, workers=None):
+    """TextBlob polarity for a list of texts, spread over a process pool."""
+    texts = [str(t) for t in texts]
+    if len(texts) < 1000:
+        return [_polarity(t) for t in texts]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(texts) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_polarity, texts, chunksize=chunksize))
+
+def sentiment_scores_path(csv_path):
+    """Sidecar file holding the precomputed scores for `csv_path`."""
+    return os.path.splitext(csv_path)[0] + "_sentiment.csv"
+
+def update_sentiment_scores(data, scores_path, workers=None):
+    """
+    Returns a Series of polarity scores aligned with `data`.
+    Only lyrics whose hash is not yet in `scores_path` get scored;
+    the new scores are appended to the sidecar file. Known scores are
+    looked up in the sidecar's ScoreIndex, so the cost per call depends on
+    the size of `data`, not of the sidecar.
+    """
+    hashes = lyrics_hash(data['lyrics'])
+    index = ScoreIndex(scores_path)
+    scores = index.lookup(hashes.to_numpy())
+
+    missing = np.isnan(scores)
+    if missing.any():
+        new = pd.DataFrame({'lyrics_hash': hashes[missing], 'lyrics': data.loc[missing, 'lyrics']})
+        new = new.drop_duplicates('lyrics_hash')
+        new['sentiment'] = score_polarity(new['lyrics'].fillna("").tolist(), workers=workers)
+        new = new[['lyrics_hash', 'sentiment']]
+        new.to_csv(scores_path, mode='a', header=not os.path.exists(scores_path), index=False)
+        index.sync()
+        scores[missing] = hashes[missing].map(new.set_index('lyrics_hash')['sentiment']).to_numpy()
+
+    return pd.Series(scores, index=data.index, name='sentiment')
+
+class ScoreIndex:
+    """
+    Sorted, memory-mapped copy of a sentiment sidecar for lookups by hash.
+
+    The index directory (next to the sidecar) holds sorted runs of
+    (lyrics_hash, sentiment) arrays plus how many bytes of the sidecar
+    they cover. Rows appended to the sidecar since are imported as a new
+    run; past MAX_RUNS runs they are merged into one. A lookup is one
+    binary search per run, so it reads a few pages per hash instead of
+    the whole sidecar. A sidecar that shrank (rewritten) is re-imported.
+    """
+    MAX_RUNS = 8
+    IMPORT_CHUNK = 1_000_000
+
+    def __init__(self, scores_path):
+        self.scores_path = scores_path
+        self.directory = os.path.splitext(scores_path)[0] + '_index'
+        self.sync()
+
+    def _meta_path(self):
+        return os.path.join(self.directory, 'meta.json')
+
+    def _run_paths(self, run):
+        base = os.path.join(self.directory, f'run-{run:05d}')
+        return base + '-hashes.npy', base + '-scores.npy'
+
+    def sync(self):
+        """Imports the rows appended to the sidecar since the last sync."""
+        meta = {'runs': [], 'next_run': 0, 'csv_bytes': 0}
+        if os.path.exists(self._meta_path()):
+            with open(self._meta_path()) as f:
+                meta = json.load(f)
+        size = os.path.getsize(self.scores_path) if os.path.exists(self.scores_path) else 0
+        if size < meta['csv_bytes']:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            meta = {'runs': [], 'next_run': 0, 'csv_bytes': 0}
+        if size > meta['csv_bytes']:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.scores_path, 'rb') as f:
+                f.seek(meta['csv_bytes'])
+                chunks = pd.read_csv(
+                    f, header=0 if meta['csv_bytes'] == 0 else None, names=['lyrics_hash', 'sentiment'],
+                    dtype={'lyrics_hash': 'uint64', 'sentiment': 'float64'}, chunksize=self.IMPORT_CHUNK,
+                )
+                for chunk in chunks:
+                    meta['runs'].append(self._write_run(meta['next_run'], chunk['lyrics_hash'].to_numpy(), chunk['sentiment'].to_numpy()))
+                    meta['next_run'] += 1
+            meta['csv_bytes'] = size
+            if len(meta['runs']) > self.MAX_RUNS:
+                meta['runs'] = [self._merge_runs(meta['runs'], meta['next_run'])]
+                meta['next_run'] += 1
+            with open(self._meta_path(), 'w') as f:
+                json.dump(meta, f)
+        self.runs = [tuple(np.load(path, mmap_mode='r') for path in self._run_paths(run)) for run in meta['runs']]
+
+    def _write_run(self, run, hashes, scores):
+        # Sorted by hash; of duplicate hashes the last one (newest score) is kept
+        last = len(hashes) - 1 - np.unique(hashes[::-1], return_index=True)[1]
+        hashes_path, scores_path = self._run_paths(run)
+        np.save(hashes_path, hashes[last])
+        np.save(scores_path, scores[last])
+        return run
+
+    def _merge_runs(self, runs, run):
+        hashes = np.concatenate([np.load(self._run_paths(r)[0]) for r in runs])
+        scores = np.concatenate([np.load(self._run_paths(r)[1]) for r in runs])
+        merged = self._write_run(run, hashes, scores)
+        for r in runs:
+            for path in self._run_paths(r):
+                os.remove(path)
+        return merged
+
+    def lookup(self, hashes):
+        """Scores of `hashes` (float64, NaN where unknown); newer runs win."""
+        scores = np.full(len(hashes), np.nan)
+        for run_hashes, run_scores in reversed(self.runs):
+            todo = np.flatnonzero(np.isnan(scores))
+            if not len(todo):
+                break
+            if not len(run_hashes):
+                continue
+            pos = np.minimum(np.searchsorted(run_hashes, hashes[todo]), len(run_hashes) - 1)
+            found = run_hashes[pos] == hashes[todo]
+            scores[todo[found]] = run_scores[pos[found]]
+        return scores
+
+@profiled
 def analyze_sentiment(data):
     """
     Adds a 'sentiment' column to the dataframe (polarity from -1 to +1).
+    `load_data` already joins the precomputed scores, so this only scores
+    frames that did not come from it.
     """
     if 'sentiment' not in data.columns:
-        data['sentiment'] = data['lyrics'].apply(lambda x: TextBlob(str(x)).sentiment.polarity)
+        data = data.copy()
+        data['sentiment'] = score_polarity(data['lyrics'].fillna("").tolist())
     return data
 
+@profiled
 def get_top_songs_by_sentiment(data, artist_name=None, top_n=3):
     if artist_name:
         filtered_data = data[data['artist'] == artist_name]
@@ -20,10 +165,12 @@ def get_top_songs_by_sentiment(data, artist_name=None, top_n=3):
     if filtered_data.empty:
         return pd.DataFrame(columns=['title', 'artist', 'sentiment']), pd.DataFrame(columns=['title', 'artist', 'sentiment'])
 
-    filtered_data = analyze_sentiment(filtered_data)
+    if 'sentiment' not in filtered_data.columns:
+        filtered_data = analyze_sentiment(filtered_data)
 
-    top_positive = filtered_data.sort_values(by='sentiment', ascending=False).head(top_n)
-    top_negative = filtered_data.sort_values(by='sentiment', ascending=True).head(top_n)
+    # Partial selection instead of two full sorts
+    top_positive = filtered_data.nlargest(top_n, 'sentiment')
+    top_negative = filtered_data.nsmallest(top_n, 'sentiment')
 
     return top_positive, top_negative
 
@@ -72,3 +219,11 @@ def explain_sentiment(sentiment_score):
         st.error("😞 Highly Negative – Lyrics convey sadness or frustration.")
     else:
         st.warning("😐 Neutral – Mixed or balanced sentiment.")
+
+if __name__ == "__main__":
+    # Offline scoring stage: python sentiment_analysis.py [csv_path]
+    import sys
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else 'filtered_rock_1950_2000_cleaned.csv'
+    corpus = pd.read_csv(csv_path, usecols=['lyrics', 'language'])
+    corpus = corpus[corpus['language'] == 'en']
+    update_sentiment_scores(corpus, sentiment_scores_path(csv_path))
@@ -0,0 +1,213 @@
+"""
+Similar-song and similar-artist search over compact song vectors.
+
+Every song gets a DIM-dimensional float32 vector: its TF-IDF weights over
+the MAX_FEATURES most common corpus words, randomly projected down to DIM
+and L2-normalized. An artist vector is the mean of its songs' vectors,
+centered on the corpus mean (so shared filler words do not make every
+artist alike) and normalized. Both matrices live under the store as raw float32 files and are
+memory-mapped, so a query is one matrix-vector product plus a top-N
+selection; nothing is trained per request.
+
+The vocabulary features, IDF weights and projection are fitted once. When
+songs are ingested, only the new store parts are vectorized and appended
+(and the artist matrix re-summed). A refit happens when the corpus has
+grown by more than REFIT_GROWTH since the fit, or with --refit.
+
+    python similarity.py [--refit]
+"""
+import argparse
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from corpus import read_tokens
+from loader import STORE_DIR, ensure_store, get_corpus, load_data, read_meta, read_store
+from profiling import profiled, profiled_cache
+
+SIMILARITY_DIR = os.path.join(STORE_DIR, 'similarity')
+MAX_FEATURES = 20_000
+DIM = 128
+REFIT_GROWTH = 0.5
+SEED = 42
+
+def _path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'similarity', name)
+
+def _read_index_meta(store_dir=STORE_DIR):
+    if not os.path.exists(_path('meta.json', store_dir)):
+        return {}
+    with open(_path('meta.json', store_dir)) as f:
+        return json.load(f)
+
+# ---------- FIT (vocabulary features, IDF, projection) ----------
+def fit_model(store_dir=STORE_DIR):
+    """Picks the features and IDF weights from the whole corpus; draws the projection."""
+    corpus = get_corpus()
+    n_docs = len(corpus.song_ids)
+    lengths = np.diff(corpus.offsets)
+    rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+    # Document frequency: distinct (song, word) pairs per word
+    pairs = np.unique(rows * len(corpus.vocab) + corpus.ids)
+    df = np.bincount(pairs % len(corpus.vocab), minlength=len(corpus.vocab))
+    features = np.sort(np.argsort(-df, kind='stable')[:MAX_FEATURES])
+    features = features[df[features] > 0]
+    idf = (np.log((1 + n_docs) / (1 + df[features])) + 1).astype(np.float32)
+    projection = np.random.default_rng(SEED).standard_normal((len(features), DIM)).astype(np.float32) / np.sqrt(DIM)
+    np.savez(_path('model.npz', store_dir), features=features, idf=idf, projection=projection)
+    return features, idf, projection
+
+def load_model(store_dir=STORE_DIR):
+    model = np.load(_path('model.npz', store_dir))
+    return model['features'], model['idf'], model['projection']
+
+# ---------- VECTORS ----------
+def song_vectors(ids, offsets, features, idf, projection):
+    """L2-normalized (songs x DIM) float32 vectors of songs in CSR token layout."""
+    from scipy.sparse import csr_matrix  # lazy: see nlp.py
+
+    # Token id -> feature column (-1 = not a feature; words added after the fit too)
+    column = np.full(max(int(ids.max(initial=0)) + 1, int(features.max(initial=0)) + 1), -1, dtype=np.int64)
+    column[features] = np.arange(len(features))
+    n_songs = len(offsets) - 1
+    rows = np.repeat(np.arange(n_songs, dtype=np.int64), np.diff(offsets))
+    cols = column[ids]
+    keep = cols >= 0
+    tfidf = csr_matrix(
+        (np.ones(keep.sum(), dtype=np.float32), (rows[keep], cols[keep])),
+        shape=(n_songs, len(features)),
+    )
+    tfidf.sum_duplicates()
+    tfidf.data = (1 + np.log(tfidf.data)) * idf[tfidf.indices]  # sublinear TF x IDF
+    vectors = np.asarray(tfidf @ projection, dtype=np.float32)
+    return _normalize(vectors)
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+def update_index(refit=False, store_dir=STORE_DIR):
+    """
+    Vectorizes the store parts not indexed yet and appends them; refits and
+    re-vectorizes everything first if needed. Returns the number of songs added.
+    """
+    os.makedirs(os.path.join(store_dir, 'similarity'), exist_ok=True)
+    meta = _read_index_meta(store_dir)
+    store_rows = read_meta(store_dir).get('rows', 0)
+    fitted_rows = meta.get('fit_rows', 0)
+    if refit or not meta or store_rows > fitted_rows * (1 + REFIT_GROWTH):
+        for name in ('songs.f32', 'song_ids.i64'):
+            if os.path.exists(_path(name, store_dir)):
+                os.remove(_path(name, store_dir))
+        fit_model(store_dir)
+        meta = {'fit_rows': store_rows, 'parts': 0, 'rows': 0}
+
+    features, idf, projection = load_model(store_dir)
+    parts = sorted(glob.glob(os.path.join(store_dir, 'tokens', '*.parquet')))
+    added = 0
+    for path in parts[meta['parts']:]:
+        song_ids, ids, offsets = read_tokens(path)
+        vectors = song_vectors(ids, offsets, features, idf, projection)
+        with open(_path('songs.f32', store_dir), 'ab') as f:
+            f.write(vectors.tobytes())
+        with open(_path('song_ids.i64', store_dir), 'ab') as f:
+            f.write(song_ids.astype(np.int64).tobytes())
+        added += len(song_ids)
+
+    meta.update({'parts': len(parts), 'rows': meta['rows'] + added, 'dim': DIM, 'generation': read_meta(store_dir).get('generation', 0)})
+    _write_artist_vectors(meta['rows'], store_dir)
+    with open(_path('meta.json', store_dir), 'w') as f:
+        json.dump(meta, f)
+    return added
+
+def _write_artist_vectors(rows, store_dir=STORE_DIR):
+    """Recomputes the artist matrix from the song matrix (one pass, grouped by artist)."""
+    songs = np.memmap(_path('songs.f32', store_dir), dtype=np.float32, mode='r', shape=(rows, DIM))
+    song_ids = np.fromfile(_path('song_ids.i64', store_dir), dtype=np.int64)
+    artists = pd.Categorical(read_store(['artist'], store_dir)['artist'].reindex(song_ids))
+    order = np.argsort(artists.codes, kind='stable')
+    codes = artists.codes[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(codes) else np.array([], dtype=np.int64)
+    vectors = np.asarray(songs)[order]
+    if len(codes):
+        counts = np.diff(np.r_[starts, len(codes)])[:, None]
+        means = np.add.reduceat(vectors, starts, axis=0) / counts - vectors.mean(axis=0)
+    else:
+        means = np.zeros((0, DIM), np.float32)
+    names = [str(artists.categories[c]) for c in codes[starts]]
+    _normalize(means.astype(np.float32)).tofile(_path('artists.f32', store_dir))
+    with open(_path('artists.json', store_dir), 'w') as f:
+        json.dump(names, f)
+
+# ---------- QUERIES ----------
+class SimilarityIndex:
+    """Memory-mapped song and artist vectors with top-N cosine search."""
+
+    def __init__(self, songs, song_ids, artists, artist_names):
+        self.songs = songs
+        self.song_rows = pd.Index(song_ids)
+        self.artists = artists
+        self.artist_rows = pd.Index(artist_names)
+
+    @staticmethod
+    def _top(matrix, vector, exclude, top_n):
+        scores = matrix @ vector
+        scores[exclude] = -np.inf
+        top_n = min(top_n, len(scores) - 1)
+        if top_n <= 0:
+            return np.array([], dtype=np.int64), scores[:0]
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
+    def similar_songs(self, song_id, top_n=10):
+        """(song_ids, cosine similarity) of the songs most like `song_id`."""
+        row = self.song_rows.get_loc(song_id)
+        top, scores = self._top(self.songs, np.asarray(self.songs[row]), row, top_n)
+        return pd.Series(scores, index=pd.Index(self.song_rows[top], name='song_id'), name='similarity')
+
+    def similar_artists(self, artist, top_n=10):
+        """Artists most like `artist`, with cosine similarity."""
+        row = self.artist_rows.get_loc(artist)
+        top, scores = self._top(self.artists, np.asarray(self.artists[row]), row, top_n)
+        return pd.Series(scores, index=pd.Index(self.artist_rows[top], name='artist'), name='similarity')
+
+def get_similarity_index():
+    """The memory-mapped index, updated first if songs were added since."""
+    return _cached_similarity_index(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_similarity_index(generation):
+    if _read_index_meta().get('generation') != generation:
+        update_index()
+    meta = _read_index_meta()
+    with open(_path('artists.json')) as f:
+        names = json.load(f)
+    return SimilarityIndex(
+        np.memmap(_path('songs.f32'), dtype=np.float32, mode='r', shape=(meta['rows'], DIM)),
+        np.fromfile(_path('song_ids.i64'), dtype=np.int64),
+        np.memmap(_path('artists.f32'), dtype=np.float32, mode='r', shape=(len(names), DIM)),
+        names,
+    )
+
+@profiled
+def similar_artists(artist, top_n=10):
+    """Artists whose lyrics are most like `artist`'s."""
+    return get_similarity_index().similar_artists(artist, top_n)
+
+@profiled
+def similar_songs(song_id, top_n=10, columns=('title', 'artist', 'year', 'views')):
+    """Songs most like `song_id`, with their metadata (indexed by song_id)."""
+    scores = get_similarity_index().similar_songs(song_id, top_n)
+    songs = load_data(list(columns)).loc[scores.index].copy()
+    songs['similarity'] = scores.round(3).to_numpy()
+    return songs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Update (or refit) the song/artist similarity index.")
+    parser.add_argument("--refit", action="store_true", help="refit features and projection, re-vectorize all songs")
+    args = parser.parse_args()
+    ensure_store()
+    print(f"Indexed {update_index(refit=args.refit)} new songs")
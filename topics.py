@@ -0,0 +1,172 @@
+"""
+Topic model service.
+
+LDA models are trained ahead of time, one per artist and one per decade,
+and persisted under the store (each model file carries its id2word map,
+and a small JSON file next to it a fingerprint of the songs it was
+trained on).
+Artist models are trained in parallel across a process pool; decade models
+are large, so each uses gensim's multicore LDA. The dashboard loads models
+lazily and keeps at most MAX_MODELS_IN_MEMORY of them; a model is
+retrained only once its own artist or decade has gained songs.
+
+    python topics.py [--workers N]
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+import streamlit as st
+from loader import STORE_DIR, ensure_store, get_corpus, load_data
+from profiling import profiled_cache
+
+TOPICS_DIR = os.path.join(STORE_DIR, 'topics')
+NUM_TOPICS = 5
+MAX_MODELS_IN_MEMORY = 32
+
+def model_path(kind, key):
+    """File of the persisted model for an artist or decade."""
+    digest = hashlib.md5(str(key).encode('utf-8')).hexdigest()
+    return os.path.join(TOPICS_DIR, kind, f'{digest}.lda')
+
+def _meta_path(path):
+    return path + '.json'
+
+def songs_fingerprint(corpus, rows):
+    """Count and hash of the song ids at corpus `rows`; changes when those songs change."""
+    song_ids = np.ascontiguousarray(np.sort(corpus.song_ids[rows]), dtype=np.int64)
+    return f'{len(song_ids)}:{hashlib.md5(song_ids.tobytes()).hexdigest()}'
+
+def model_fingerprint(path):
+    """Fingerprint of the songs the model at `path` was trained on (None if unknown)."""
+    if not os.path.exists(path) or not os.path.exists(_meta_path(path)):
+        return None
+    with open(_meta_path(path)) as f:
+        return json.load(f).get('songs')
+
+def bag_of_words(corpus, rows):
+    """Bag-of-words docs for `rows`, with token ids re-numbered densely (+ id2word)."""
+    token_docs = corpus.docs(rows)
+    if not token_docs:
+        return [], {}
+    uniq, local = np.unique(corpus.token_ids(rows), return_inverse=True)
+    id2word = dict(enumerate(corpus.words(uniq)))
+    bows = []
+    start = 0
+    for doc in token_docs:
+        ids, counts = np.unique(local[start:start + len(doc)], return_counts=True)
+        bows.append(list(zip(ids.tolist(), counts.tolist())))
+        start += len(doc)
+    return bows, id2word
+
+def train_model(bows, id2word, num_topics=NUM_TOPICS, path=None, workers=1, fingerprint=None):
+    """
+    Trains one LDA model (multicore if workers > 1); saves it, tagged with
+    its songs' `fingerprint`, if `path` is given.
+    """
+    if not bows or not id2word:
+        return None
+    from gensim.models import LdaModel, LdaMulticore  # lazy: see nlp.py
+    params = dict(corpus=bows, num_topics=num_topics, id2word=id2word, random_state=42, passes=1)
+    try:
+        lda = LdaMulticore(workers=workers, **params) if workers > 1 else LdaModel(**params)
+    except ValueError:
+        return None
+    if path:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lda.save(path)
+        with open(_meta_path(path), 'w') as f:
+            json.dump({'songs': fingerprint}, f)
+    return lda
+
+def _train_to_disk(task):
+    bows, id2word, path, fingerprint = task
+    train_model(bows, id2word, path=path, fingerprint=fingerprint)
+    return path
+
+def decade_rows(corpus, decade):
+    """Corpus rows of the songs released in `decade`."""
+    decades = load_data(['decade'])['decade']
+    return np.flatnonzero(decades.reindex(corpus.song_ids).to_numpy() == decade)
+
+def train_topic_models(workers=None):
+    """Trains and persists every artist and decade model that is missing or stale."""
+    workers = workers or os.cpu_count() or 1
+    corpus = get_corpus()
+
+    # Artist models: many small models, one per pool task. Bag-of-words are
+    # built as tasks are submitted, with a bounded number in flight
+    def artist_tasks():
+        for artist in corpus.artist_ranges:
+            rows = corpus.rows_for(artist)
+            path = model_path('artist', artist)
+            fingerprint = songs_fingerprint(corpus, rows)
+            if model_fingerprint(path) != fingerprint:
+                yield bag_of_words(corpus, rows) + (path, fingerprint)
+
+    tasks = artist_tasks()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                else:
+                    pending.add(pool.submit(_train_to_disk, task))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+
+    # Decade models: few large models, each on all cores
+    for decade in np.unique(load_data(['decade'])['decade']):
+        rows = decade_rows(corpus, decade)
+        path = model_path('decade', int(decade))
+        fingerprint = songs_fingerprint(corpus, rows)
+        if model_fingerprint(path) != fingerprint:
+            bows, id2word = bag_of_words(corpus, rows)
+            train_model(bows, id2word, path=path, workers=workers, fingerprint=fingerprint)
+
+@profiled_cache(st.cache_resource, max_entries=MAX_MODELS_IN_MEMORY)
+def load_model(path, fingerprint, mtime):
+    """Loads a persisted model (its songs' fingerprint and the file's mtime are part of the cache key)."""
+    from gensim.models import LdaModel
+    return LdaModel.load(path)
+
+def _topics(kind, key, rows_of, num_topics):
+    """
+    Top words of each topic. Uses the persisted model if it was trained on
+    the same songs `rows_of(corpus)` selects now; otherwise trains it once
+    from them and saves it. Songs added to other artists or decades leave
+    the model current.
+    """
+    path = model_path(kind, key)
+    corpus = get_corpus()
+    rows = rows_of(corpus)
+    fingerprint = songs_fingerprint(corpus, rows)
+    if num_topics == NUM_TOPICS and model_fingerprint(path) == fingerprint:
+        lda = load_model(path, fingerprint, os.path.getmtime(path))
+    else:
+        bows, id2word = bag_of_words(corpus, rows)
+        lda = train_model(bows, id2word, num_topics, path=path if num_topics == NUM_TOPICS else None, fingerprint=fingerprint)
+    if lda is None:
+        return []
+    return lda.show_topics(num_topics=num_topics, num_words=5, formatted=False)
+
+def topics_for_artist(artist, num_topics=NUM_TOPICS):
+    return _topics('artist', artist, lambda corpus: corpus.rows_for(artist), num_topics)
+
+def topics_for_decade(decade, num_topics=NUM_TOPICS):
+    return _topics('decade', int(decade), lambda corpus: decade_rows(corpus, decade), num_topics)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train and persist per-artist and per-decade topic models.")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    ensure_store()
+    train_topic_models(args.workers)
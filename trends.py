@@ -0,0 +1,135 @@
+"""
+Trend engine: per-year or per-decade statistics of the precomputed song
+features, optionally per artist.
+
+One grouped pass over the filtered songs sums counts, values and squared
+values (sentiment, lexical diversity) plus the per-song emotion counts;
+means, standard errors, confidence intervals and emotion shares follow
+from those sums, and rolling means from rolling sums of them. Periods
+without songs stay missing (NaN) rather than 0, so charts show gaps
+instead of dips. Results are small tables cached by filter spec (see
+filters.py).
+
+The genre-wide overview (genre_trend) does not scan songs at all: the
+same sums are kept per (year, word-count bucket) cell, once per store
+generation, and each sidebar change only adds up a slice of those cells,
+like the aggregate cube behind the other overview charts. Medians cannot
+be summed, so they are left to trend_table.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+from cube import word_count_bucket
+from emotions import get_song_emotions
+from filters import filter_cache, filtered_songs
+from loader import ensure_store, load_data
+from profiling import profiled, profiled_cache
+
+METRICS = ['sentiment', 'lexical_diversity']
+PERIODS = {'year': 1, 'decade': 10}  # period column: its step in years
+ROLLING_WINDOWS = {'year': 5, 'decade': 3}  # periods per centered window
+Z_95 = 1.96
+
+@filter_cache()
+def trend_table(spec, period='year', by=None):
+    """
+    Statistics per `period` (per (`by`, period) if `by`, e.g. 'artist'):
+    songs; for each metric its mean, median, 95% confidence interval
+    (ci_low/ci_high) and centered rolling mean; and the share of each
+    emotion among the period's emotion words (emotion_<name>).
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {list(PERIODS)}")
+    keys = [by, period] if by else [period]
+    data = filtered_songs(spec, list(dict.fromkeys(keys + METRICS)))
+    grouped = _song_sums(data).groupby([data[k] for k in keys], observed=True)
+    return _stats(grouped.sum(), period, by, grouped[METRICS].median())
+
+@profiled
+def genre_trend(decades, max_words, period='year'):
+    """
+    trend_table(song_filter(None, decades, max_words), period) without the
+    medians, summed from the (year, word-count bucket) cells instead of
+    the songs. `max_words` must be a multiple of WORD_COUNT_STEP (as the
+    slider is), so that whole buckets match.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unknown period {period!r}; expected one of {list(PERIODS)}")
+    cells = get_trend_cells()
+    mask = cells['decade'].isin(decades).to_numpy() & (cells['bucket'].to_numpy() <= max_words)
+    sums = cells[mask].groupby(period)[_sum_columns(cells)].sum()
+    return _stats(sums, period)
+
+def get_trend_cells():
+    """Per-(year, word-count bucket) sums behind genre_trend, built once per store generation."""
+    return _cached_trend_cells(ensure_store())
+
+@profiled_cache(st.cache_resource)
+def _cached_trend_cells(generation):
+    data = load_data(['year', 'lyric_length'] + METRICS)
+    cells = _song_sums(data).groupby([data['year'], word_count_bucket(data['lyric_length'])]).sum()
+    cells.index.names = ['year', 'bucket']
+    cells = cells.reset_index()
+    cells['decade'] = ((cells['year'] // 10) * 10).astype(np.int16)
+    return cells
+
+def _song_sums(data):
+    """Per-song terms of the sums: metrics, squared metrics, emotion counts and 1 per song."""
+    values = data[METRICS].astype(np.float64)
+    emotions = get_song_emotions().reindex(data.index).fillna(0)  # no emotion words = zero counts
+    frame = pd.concat([values, (values ** 2).add_suffix('_sq'), emotions.add_prefix('emotion_')], axis=1)
+    frame['songs'] = 1
+    return frame
+
+def _sum_columns(cells):
+    return [c for c in cells.columns if c not in ('year', 'bucket', 'decade')]
+
+def _stats(sums, period, by=None, medians=None):
+    """The trend table from per-group sums (and medians, if given)."""
+    n = sums['songs']
+    table = pd.DataFrame({'songs': n})
+    for metric in METRICS:
+        mean = sums[metric] / n
+        variance = (sums[f'{metric}_sq'] - n * mean ** 2) / (n - 1)
+        half_width = Z_95 * np.sqrt(variance.clip(lower=0) / n)  # NaN for a single song
+        table[f'{metric}_mean'] = mean
+        if medians is not None:
+            table[f'{metric}_median'] = medians[metric]
+        table[f'{metric}_ci_low'] = mean - half_width
+        table[f'{metric}_ci_high'] = mean + half_width
+        table[f'{metric}_rolling'] = _rolling_mean(sums[metric], n, period, by)
+
+    emotion_columns = [c for c in sums.columns if c.startswith('emotion_')]
+    emotion_words = sums[emotion_columns].sum(axis=1)
+    table[emotion_columns] = sums[emotion_columns].div(emotion_words.replace(0, np.nan), axis=0)
+    if not by:
+        table = table.reindex(_full_range(table.index, period))
+        table['songs'] = table['songs'].fillna(0).astype(np.int64)
+    return table
+
+def _full_range(index, period):
+    """Every period from the first to the last in `index`."""
+    if index.empty:
+        return pd.RangeIndex(0, name=period)
+    step = PERIODS[period]
+    return pd.RangeIndex(int(index.min()), int(index.max()) + step, step, name=period)
+
+def _rolling_mean(totals, counts, period, by):
+    """Centered rolling mean from per-period sums; empty periods inside the window count as no songs."""
+    if by:
+        totals, counts = totals.unstack(by, fill_value=0), counts.unstack(by, fill_value=0)
+    if totals.empty:
+        return pd.Series(dtype=np.float64)
+    full = _full_range(totals.index, period)
+    window = ROLLING_WINDOWS[period]
+    roll_totals = totals.reindex(full, fill_value=0).rolling(window, center=True, min_periods=1).sum()
+    roll_counts = counts.reindex(full, fill_value=0).rolling(window, center=True, min_periods=1).sum()
+    rolling = roll_totals / roll_counts.where(roll_counts > 0)
+    if by:
+        rolling = rolling.stack().swaplevel().sort_index()
+    return rolling
+
+def trend_wide(table, column, by='artist'):
+    """One column of a per-`by` trend table with `by` values as columns (missing periods NaN)."""
+    wide = table[column].unstack(by)
+    return wide.reindex(_full_range(wide.index, wide.index.name))